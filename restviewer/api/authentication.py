@@ -0,0 +1,110 @@
+from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.token_versions import get_token_version
+
+CLAIMS = ('role', 'is_superuser', 'is_active')
+VERSION_CLAIM = 'token_version'
+
+
+class RoleAccessToken(AccessToken):
+    """Access token carrying the user fields that permissions check."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in CLAIMS:
+            token[claim] = getattr(user, claim)
+        token[VERSION_CLAIM] = user.token_version
+        return token
+
+
+class ClaimsUser(SimpleLazyObject):
+    """User answering permission checks from token claims.
+
+    The user row is only loaded when a view touches anything else, for
+    example when the user is assigned as an author.
+    """
+
+    def __init__(self, user_id, claims, load_user):
+        super().__init__(load_user)
+        self.__dict__['claims'] = claims
+        self.__dict__['user_id'] = user_id
+
+    @property
+    def pk(self):
+        return self.__dict__['user_id']
+
+    id = pk
+
+    @property
+    def role(self):
+        return self.__dict__['claims']['role']
+
+    @property
+    def is_superuser(self):
+        return self.__dict__['claims']['is_superuser']
+
+    @property
+    def is_active(self):
+        return self.__dict__['claims']['is_active']
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __bool__(self):
+        # SimpleLazyObject would load the user to answer ``bool()``, which
+        # permission classes ask before anything else.
+        return True
+
+    def has_perms(self, perm_list, obj=None):
+        """Grant an empty list, as reads require, without loading the
+        user; anything else is answered by the user row."""
+        if not perm_list:
+            return True
+        return self.__getattr__('has_perms')(perm_list, obj)
+
+    @property
+    def is_admin(self):
+        return self.role == get_user_model().ADMIN or self.is_superuser
+
+    @property
+    def is_moderator(self):
+        return self.role == get_user_model().MODERATOR or self.is_admin
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT authentication that skips the user query for current tokens.
+
+    Only reads are answered from the claims. Writes, tokens issued before
+    the user's token version changed, and tokens without role claims are
+    authenticated the regular way.
+    """
+
+    safe_method = False
+
+    def authenticate(self, request):
+        self.safe_method = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        version = validated_token.get(VERSION_CLAIM)
+        if (not self.safe_method or user_id is None or version is None
+                or any(claim not in validated_token for claim in CLAIMS)
+                or version != get_token_version(user_id)):
+            return super().get_user(validated_token)
+        if not validated_token['is_active']:
+            raise AuthenticationFailed('User is inactive',
+                                       code='user_inactive')
+        return ClaimsUser(
+            user_id,
+            {claim: validated_token[claim] for claim in CLAIMS},
+            lambda: super(ClaimsJWTAuthentication, self).get_user(
+                validated_token)
+        )
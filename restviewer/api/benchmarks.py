@@ -0,0 +1,147 @@
+"""Scenarios and statistics of the API benchmarks.
+
+A scenario is a function sending one or more requests through ``send``,
+so the same scenarios run against the Django test client in this
+process and against a server over HTTP. Results are plain dictionaries
+stored as JSON, which makes runs on different commits comparable.
+"""
+from django.db.models import Count
+
+from reviews.models import (
+    Category,
+    Comment,
+    CustomUser,
+    Genre,
+    QueuedEmail,
+    Review,
+    Title
+)
+
+BENCH_USERNAME = 'benchmark-user-'
+BENCH_EMAIL_DOMAIN = 'benchmark.invalid'
+# Factor on the throttle limits that keeps benchmarks, which send every
+# request from one address, below them.
+THROTTLE_RATE_MULTIPLIER = 10 ** 6
+
+
+class RequestFailed(Exception):
+    pass
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def summarize(latencies, errors, elapsed, queries=None):
+    """Return throughput and latency figures of one scenario run."""
+    summary = {
+        'requests': len(latencies) + errors,
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0,
+    }
+    if latencies:
+        summary.update({
+            'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+            'p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+            'p90_ms': round(percentile(latencies, 0.9) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        })
+    if queries:
+        summary['queries'] = round(sum(queries) / len(queries), 2)
+    return summary
+
+
+def get(path):
+    def scenario(send, number):
+        send('get', path)
+    return scenario
+
+
+def signup_token(send, number):
+    """Sign a new user up and exchange the confirmation code for a token.
+
+    The code is read from the database instead of the queued email, so
+    over HTTP the server has to use the same database and run with the
+    ``THROTTLE_RATE_MULTIPLIER`` above.
+    """
+    username = f'{BENCH_USERNAME}{number}'
+    send('post', 'auth/signup/', {
+        'username': username,
+        'email': f'{username}@{BENCH_EMAIL_DOMAIN}',
+    })
+    confirmation_code = CustomUser.objects.values_list(
+        'confirmation_code', flat=True).get(username=username)
+    send('post', 'auth/token/', {
+        'username': username,
+        'confirmation_code': confirmation_code,
+    })
+
+
+def delete_bench_users():
+    CustomUser.objects.filter(username__startswith=BENCH_USERNAME).delete()
+    QueuedEmail.objects.filter(
+        recipient__endswith=f'@{BENCH_EMAIL_DOMAIN}').delete()
+
+
+def scenarios():
+    """Return ``{name: scenario}`` for the catalog in the database.
+
+    Feeds are read from the title with the most reviews and the review
+    with the most comments, so they always have full pages.
+    """
+    title = Title.objects.order_by('-review_count', 'pk').first()
+    category = Category.objects.order_by('pk').first()
+    genre = Genre.objects.order_by('pk').first()
+    if not (title and category and genre):
+        raise ValueError(
+            'Generate or import a catalog before running benchmarks.')
+    review = title.reviews.annotate(
+        comment_count=Count('comments')).order_by('-comment_count',
+                                                  'pk').first()
+    reviews = f'titles/{title.pk}/reviews/'
+    result = {
+        'titles': get('titles/'),
+        'titles_filtered': get(
+            f'titles/?category={category.slug}&genre={genre.slug}'),
+        'titles_top_rated': get('titles/?ordering=-rating'),
+        'title': get(f'titles/{title.pk}/'),
+        'reviews': get(reviews),
+        'reviews_cursor': get(f'{reviews}?pagination=cursor'),
+        'leaderboard': get('leaderboards/'),
+        'leaderboard_genre': get(f'leaderboards/genre/{genre.slug}/'),
+    }
+    if review is not None:
+        comments = f'{reviews}{review.pk}/comments/'
+        result['comments'] = get(comments)
+        result['comments_cursor'] = get(f'{comments}?pagination=cursor')
+    result['signup_token'] = signup_token
+    return result
+
+
+def dataset():
+    return {
+        'users': CustomUser.objects.count(),
+        'titles': Title.objects.count(),
+        'reviews': Review.objects.count(),
+        'comments': Comment.objects.count(),
+    }
+
+
+def regressions(results, baseline, max_regression):
+    """Yield messages for scenarios slower than the baseline.
+
+    A scenario regressed when its median latency grew, or its throughput
+    fell, by more than ``max_regression`` percent.
+    """
+    for mode, runs in results.items():
+        for name, summary in runs.items():
+            before = baseline.get(mode, {}).get(name)
+            if not before or 'p50_ms' not in before or 'p50_ms' not in summary:
+                continue
+            slower = (summary['p50_ms'] / before['p50_ms'] - 1) * 100
+            fewer = (1 - summary['rps'] / before['rps']) * 100
+            if max(slower, fewer) > max_regression:
+                yield (f'{mode} {name}: p50 {before["p50_ms"]} -> '
+                       f'{summary["p50_ms"]} ms, {before["rps"]} -> '
+                       f'{summary["rps"]} req/s')
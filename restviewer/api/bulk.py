@@ -0,0 +1,291 @@
+"""List serializers behind the bulk create and partial update endpoints.
+
+A whole payload is validated before anything is written, and errors are
+reported per item in the order of the payload. Slug lookups of all items
+are answered from one query per related model, or from ``api.slugs`` for
+categories and genres, and rows are written with
+``bulk_create``/``bulk_update``. Those skip model signals, so rating
+totals, leaderboards, change timestamps and cached responses are updated
+here.
+"""
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.encoding import smart_str
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from reviews.models import LeaderboardEntry, Review, Title
+
+from api.cache import invalidate
+from api.slugs import CACHED_MODELS, forget_all, get_object
+from api.variable import LIMIT_BULK_ITEMS
+
+DUPLICATE_ID = 'Duplicate id.'
+DUPLICATE_REVIEW = 'You can only post one review per title.'
+
+
+def create_with_ids(objs):
+    """``bulk_create`` that leaves primary keys set on ``objs``.
+
+    Backends that cannot return ids from a bulk insert get ids following
+    the current maximum. Call it in a transaction: a concurrent insert
+    then fails with an IntegrityError instead of mixing rows up.
+    """
+    if not objs:
+        return objs
+    model = type(objs[0])
+    if not connection.features.can_return_rows_from_bulk_insert:
+        last_id = model.objects.aggregate(last_id=Max('pk'))['last_id'] or 0
+        for offset, obj in enumerate(objs, 1):
+            obj.pk = last_id + offset
+    return model.objects.bulk_create(objs)
+
+
+def add_title_genres(genres):
+    """Link titles to genres given as ``{title_id: genres}``."""
+    through = Title.genre.through
+    through.objects.bulk_create([
+        through(title_id=title_id, genre_id=genre_id)
+        for title_id, items in genres.items()
+        for genre_id in {genre.pk for genre in items}
+    ])
+
+
+class PrefetchedSlugRelatedField(serializers.SlugRelatedField):
+    """Slug field reading objects prefetched by ``BulkListSerializer``.
+
+    Category and genre slugs are read from ``api.slugs``. Other slugs
+    outside of a bulk request are queried like in the parent class.
+    """
+
+    @property
+    def related_key(self):
+        return self.get_queryset().model, self.slug_field
+
+    @property
+    def slug_cached(self):
+        model, slug_field = self.related_key
+        return model in CACHED_MODELS and slug_field == 'slug'
+
+    def get_related(self, slug):
+        """Return the object with ``slug``, or ``None``."""
+        if self.slug_cached:
+            return get_object(self.related_key[0], slug)
+        return self.context['related'][self.related_key].get(slug)
+
+    def to_internal_value(self, data):
+        if (not self.slug_cached
+                and self.related_key not in self.context.get('related', {})):
+            return super().to_internal_value(data)
+        if not isinstance(data, (str, int)) or isinstance(data, bool):
+            self.fail('invalid')
+        obj = self.get_related(str(data))
+        if obj is None:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=smart_str(data))
+        return obj
+
+
+class CurrentSlugsMixin:
+    """Save once more after validating again when a category or genre
+    resolved by ``api.slugs`` was deleted by another process.
+
+    The write runs in a transaction, so the missing row fails it as a
+    whole; validating again reloads the slugs and reports it as unknown.
+    """
+
+    def save(self, **kwargs):
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError:
+            forget_all()
+            del self._validated_data
+            self.is_valid(raise_exception=True)
+            return super().save(**kwargs)
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """List serializer writing all items of a payload at once.
+
+    For partial updates ``instance`` maps ids to the objects to update,
+    and every item names its object with an ``id`` field.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            return super().to_internal_value(data)
+        if len(data) > LIMIT_BULK_ITEMS:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    f'At most {LIMIT_BULK_ITEMS} items are accepted.']
+            })
+        self.context['related'] = self.fetch_related(data)
+        items = []
+        errors = []
+        for item in data:
+            try:
+                items.append(self.child.run_validation(item))
+                errors.append({})
+            except serializers.ValidationError as error:
+                items.append(None)
+                errors.append(error.detail)
+        valid = [index for index, item in enumerate(items)
+                 if item is not None]
+        for index, error in zip(valid, self.item_errors(
+                [items[index] for index in valid])):
+            errors[index].update(error)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+    def fetch_related(self, data):
+        """Load the objects named by slugs anywhere in the payload."""
+        slugs = {}
+        for name, field in self.child.fields.items():
+            relation = getattr(field, 'child_relation', field)
+            if (field.read_only
+                    or not isinstance(relation, PrefetchedSlugRelatedField)
+                    or relation.slug_cached):
+                continue
+            values = slugs.setdefault(relation.related_key, set())
+            for item in data:
+                if not isinstance(item, dict):
+                    continue
+                value = item.get(name)
+                for slug in value if isinstance(value, list) else [value]:
+                    if isinstance(slug, (str, int)):
+                        values.add(str(slug))
+        return {
+            (model, slug_field): model.objects.in_bulk(
+                values, field_name=slug_field)
+            for (model, slug_field), values in slugs.items()
+        }
+
+    def item_errors(self, items):
+        """Return per item errors found by comparing items to each other."""
+        errors = [{} for item in items]
+        if self.instance is not None:
+            seen = set()
+            for error, item in zip(errors, items):
+                if item['id'] in seen:
+                    error['id'] = [DUPLICATE_ID]
+                seen.add(item['id'])
+        return errors
+
+
+class BulkUpdateItemMixin(serializers.Serializer):
+    """Item of a bulk partial update, naming the object it changes."""
+
+    id = serializers.IntegerField()
+
+    def validate_id(self, value):
+        if value not in self.parent.instance:
+            raise serializers.ValidationError('Not found.')
+        return value
+
+    def validate(self, attrs):
+        # Partial updates make every field optional, the id included.
+        if 'id' not in attrs:
+            raise serializers.ValidationError(
+                {'id': [self.fields['id'].error_messages['required']]})
+        return super().validate(attrs)
+
+
+class BulkTitleListSerializer(CurrentSlugsMixin, BulkListSerializer):
+
+    def create(self, validated_data):
+        genres = [item.pop('genre') for item in validated_data]
+        titles = [Title(**item) for item in validated_data]
+        with transaction.atomic():
+            create_with_ids(titles)
+            add_title_genres({
+                title.pk: items for title, items in zip(titles, genres)})
+            LeaderboardEntry.objects.refresh(
+                Title.objects.filter(pk__in=[title.pk for title in titles]))
+        invalidate('titles')
+        return self.refetch([title.pk for title in titles])
+
+    def update(self, instances, validated_data):
+        now = timezone.now()
+        titles = []
+        genres = {}
+        fields = {'modified'}
+        for item in validated_data:
+            title = instances[item.pop('id')]
+            if 'genre' in item:
+                genres[title.pk] = item.pop('genre')
+            for attr, value in item.items():
+                setattr(title, attr, value)
+            fields.update(item)
+            title.modified = now
+            titles.append(title)
+        with transaction.atomic():
+            Title.objects.bulk_update(titles, fields)
+            Title.genre.through.objects.filter(title_id__in=genres).delete()
+            add_title_genres(genres)
+            LeaderboardEntry.objects.refresh(
+                Title.objects.filter(pk__in=[title.pk for title in titles]))
+        invalidate('titles')
+        return self.refetch([title.pk for title in titles])
+
+    @staticmethod
+    def refetch(ids):
+        titles = Title.objects.select_related('category').prefetch_related(
+            'genre').in_bulk(ids)
+        return [titles[pk] for pk in ids]
+
+
+class BulkReviewListSerializer(BulkListSerializer):
+    """Reviews of the title in the view, posted for any authors."""
+
+    @property
+    def title(self):
+        return self.context['view'].title
+
+    def item_errors(self, items):
+        errors = super().item_errors(items)
+        if self.instance is not None:
+            return errors
+        authors = [item['author'].pk for item in items]
+        seen = set(self.title.reviews.filter(
+            author__in=authors).values_list('author_id', flat=True))
+        for error, author in zip(errors, authors):
+            if author in seen:
+                error['author'] = [DUPLICATE_REVIEW]
+            seen.add(author)
+        return errors
+
+    def create(self, validated_data):
+        reviews = [Review(title=self.title, **item) for item in validated_data]
+        with transaction.atomic():
+            create_with_ids(reviews)
+            self.update_title(len(reviews),
+                              sum(review.score for review in reviews))
+        return reviews
+
+    def update(self, instances, validated_data):
+        reviews = []
+        fields = set()
+        score = 0
+        for item in validated_data:
+            review = instances[item.pop('id')]
+            if 'score' in item:
+                score += item['score'] - review.score
+            for attr, value in item.items():
+                setattr(review, attr, value)
+            fields.update(item)
+            reviews.append(review)
+        with transaction.atomic():
+            if fields:
+                Review.objects.bulk_update(reviews, fields)
+            self.update_title(0, score)
+        return reviews
+
+    def update_title(self, count, score):
+        titles = Title.objects.filter(pk=self.title.pk)
+        if count or score:
+            titles.apply_review_delta(count, score)
+        titles.touch()
+        invalidate('titles')
@@ -0,0 +1,102 @@
+from threading import Lock
+from urllib.parse import urlencode
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+HITS = 'hits'
+MISSES = 'misses'
+EVICTIONS = 'evictions'
+
+_stats = {HITS: 0, MISSES: 0, EVICTIONS: 0}
+_stats_lock = Lock()
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def count(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def get_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def version_key(group):
+    return f'response:{group}:version'
+
+
+def response_key(group, request, params):
+    """Return the key of a response, keeping only the query parameters
+    in ``params``; repeated values keep their order. Responses hold
+    absolute links, so the scheme and host are part of the key."""
+    query = urlencode([
+        (name, value)
+        for name, values in sorted(request.query_params.lists())
+        if name in params
+        for value in values
+    ])
+    return (f'response:{group}:{request.scheme}://{request.get_host()}'
+            f'{request.path}?{query}')
+
+
+def get_version(cache, group, version):
+    if version is None:
+        cache.add(version_key(group), uuid4().hex, None)
+        version = cache.get(version_key(group))
+    return version
+
+
+def current_version(group):
+    cache = get_cache()
+    return get_version(cache, group, cache.get(version_key(group)))
+
+
+def shared_version(group):
+    """Return the current version of ``group`` if every process reads
+    the same one, or ``None`` when each keeps its own in local memory."""
+    cache = get_cache()
+    if isinstance(cache, (DummyCache, LocMemCache)):
+        return None
+    return get_version(cache, group, cache.get(version_key(group)))
+
+
+def get_response_data(group, request, params):
+    """Return ``(version, data)``; data is ``None`` unless it is current.
+
+    Every entry stores the group version it was built for, so bumping the
+    version invalidates the whole group without deleting keys one by one.
+    """
+    cache = get_cache()
+    key = response_key(group, request, params)
+    found = cache.get_many((version_key(group), key))
+    version = get_version(cache, group, found.get(version_key(group)))
+    entry = found.get(key)
+    if entry is not None:
+        if entry[0] == version:
+            count(HITS)
+            return version, entry[1]
+        cache.delete(key)
+        count(EVICTIONS)
+    count(MISSES)
+    return version, None
+
+
+def set_response_data(group, request, params, version, data):
+    get_cache().set(
+        response_key(group, request, params),
+        (version, data),
+        settings.RESPONSE_CACHE_TIMEOUT
+    )
+
+
+def invalidate(*groups):
+    get_cache().set_many(
+        {version_key(group): uuid4().hex for group in groups}, None)
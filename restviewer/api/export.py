@@ -0,0 +1,131 @@
+"""Streaming export of the catalog as NDJSON or CSV.
+
+Rows are read with chunked ``QuerySet.iterator()`` calls and encoded one
+chunk at a time, so memory use does not depend on the size of the
+catalog. Title genres are fetched per chunk, since ``prefetch_related``
+does not apply to iterators.
+"""
+import csv
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from reviews.models import Comment, Review, Title
+
+from api.renderers import SEPARATORS, dumps
+
+CHUNK_SIZE = 2000
+
+EXPORTS = {
+    'titles': (
+        Title.objects.all(),
+        {
+            'id': 'id',
+            'name': 'name',
+            'year': 'year',
+            'description': 'description',
+            'category': 'category__slug',
+            'rating': 'rating',
+            'review_count': 'review_count',
+        },
+    ),
+    'reviews': (
+        Review.objects.all(),
+        {
+            'id': 'id',
+            'title_id': 'title_id',
+            'author': 'author__username',
+            'score': 'score',
+            'text': 'text',
+            'pub_date': 'pub_date',
+        },
+    ),
+    'comments': (
+        Comment.objects.all(),
+        {
+            'id': 'id',
+            'title_id': 'review__title_id',
+            'review_id': 'review_id',
+            'author': 'author__username',
+            'text': 'text',
+            'pub_date': 'pub_date',
+        },
+    ),
+}
+
+
+def export_fields(kind):
+    fields = list(EXPORTS[kind][1])
+    if kind == 'titles':
+        fields.insert(fields.index('category') + 1, 'genre')
+    return fields
+
+
+def chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def add_genres(chunk):
+    genres = {}
+    for title_id, slug in Title.genre.through.objects.filter(
+        title_id__in=[record['id'] for record in chunk]
+    ).order_by('genre__slug').values_list('title_id', 'genre__slug'):
+        genres.setdefault(title_id, []).append(slug)
+    for record in chunk:
+        record['genre'] = genres.get(record['id'], [])
+
+
+def export_records(kind, chunk_size=CHUNK_SIZE):
+    """Yield lists of at most ``chunk_size`` records ordered by id."""
+    queryset, columns = EXPORTS[kind]
+    rows = queryset.order_by('pk').values_list(*columns.values())
+    for chunk in chunks(rows.iterator(chunk_size=chunk_size), chunk_size):
+        records = [dict(zip(columns, row)) for row in chunk]
+        if kind == 'titles':
+            add_genres(records)
+        yield records
+
+
+class Echo:
+    """File-like object returning whatever is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(fields, records):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=SEPARATORS)
+    for record in records:
+        yield dumps(
+            {field: record[field] for field in fields}, encoder).decode()
+        yield '\n'
+
+
+def csv_lines(fields, records):
+    writer = csv.writer(Echo())
+    for record in records:
+        yield writer.writerow([
+            ','.join(value) if isinstance(value, list) else value
+            for value in (record[field] for field in fields)
+        ])
+
+
+FORMATS = {
+    'ndjson': ('application/x-ndjson', ndjson_lines),
+    'csv': ('text/csv', csv_lines),
+}
+
+
+def export(kind, export_format, chunk_size=CHUNK_SIZE):
+    """Yield the export of ``kind`` as text, one chunk of rows at a time."""
+    fields = export_fields(kind)
+    encode = FORMATS[export_format][1]
+    if export_format == 'csv':
+        yield csv.writer(Echo()).writerow(fields)
+    for records in export_records(kind, chunk_size):
+        yield ''.join(encode(fields, records))
@@ -1,12 +1,50 @@
-from django_filters import CharFilter, FilterSet
+from django_filters import CharFilter, ChoiceFilter, FilterSet
 
-from reviews.models import Title
+from reviews.models import Category, Genre, Title
+
+from api.slugs import get_id
+
+# Every ordering is read from an index, and ties are broken by id in the
+# same direction, which the index covers too. Sorting by several fields
+# at once would need a sort of its own, so only one is accepted.
+TITLE_ORDERINGS = ('year', 'name', 'rating', 'review_count')
 
 
 class TitleFilterSet(FilterSet):
-    category = CharFilter(field_name='category__slug')
-    genre = CharFilter(field_name='genre__slug')
+    # Slugs are turned into ids by api.slugs, so neither the category
+    # nor the genre table is joined.
+    category = CharFilter(method='filter_category')
+    genre = CharFilter(method='filter_genre')
+    ordering = ChoiceFilter(
+        label='Ordering',
+        choices=[
+            (f'{prefix}{field}', f'{field} ({direction})')
+            for field in TITLE_ORDERINGS
+            for prefix, direction in (('', 'ascending'), ('-', 'descending'))
+        ],
+        method='order'
+    )
 
     class Meta:
         model = Title
-        fields = ('category', 'genre', 'name', 'year')
+        fields = {
+            'name': ('exact',),
+            'year': ('exact', 'gte', 'lte'),
+            'rating': ('gte',),
+        }
+
+    def filter_category(self, queryset, name, value):
+        category_id = get_id(Category, value)
+        if category_id is None:
+            return queryset.none()
+        return queryset.filter(category_id=category_id)
+
+    def filter_genre(self, queryset, name, value):
+        genre_id = get_id(Genre, value)
+        if genre_id is None:
+            return queryset.none()
+        return queryset.filter(genre=genre_id)
+
+    def order(self, queryset, name, value):
+        return queryset.order_by(
+            value, '-pk' if value.startswith('-') else 'pk')
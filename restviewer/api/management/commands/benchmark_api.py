@@ -0,0 +1,264 @@
+import json
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+from threading import local
+from time import perf_counter
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from api.benchmarks import (
+    THROTTLE_RATE_MULTIPLIER,
+    RequestFailed,
+    dataset,
+    delete_bench_users,
+    regressions,
+    scenarios,
+    summarize
+)
+from api.metrics import timing
+
+IN_PROCESS = 'in-process'
+HTTP = 'http'
+MODES = (IN_PROCESS, HTTP)
+API_ROOT = '/api/v1/'
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', 'HEAD'), capture_output=True, text=True,
+            check=True, cwd=settings.BASE_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures throughput and latency of the main API endpoints and '
+        'stores the results as JSON for comparison between commits'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mode',
+            choices=(*MODES, 'both'),
+            default=IN_PROCESS,
+            help='Send requests through the test client in this process, '
+                 'over HTTP to a running server, or both.'
+        )
+        parser.add_argument(
+            '--base-url',
+            default='http://127.0.0.1:8000/api/v1/',
+            help='API root of the server measured in HTTP mode. It has '
+                 'to use the same database as this command.'
+        )
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=20,
+            help='Requests per scenario sent before measuring.'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help='Concurrent clients in HTTP mode.'
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            dest='scenarios',
+            help='Scenario to run; can be repeated. Runs all by default.'
+        )
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='Bypass the response cache in in-process mode.'
+        )
+        parser.add_argument(
+            '--output',
+            type=Path,
+            help='File the results are written to as JSON.'
+        )
+        parser.add_argument(
+            '--compare',
+            type=Path,
+            help='JSON results of an earlier run to compare with.'
+        )
+        parser.add_argument(
+            '--max-regression',
+            type=float,
+            default=10,
+            help='Percent of median latency or throughput a scenario may '
+                 'lose against --compare before the command fails.'
+        )
+
+    def handle(self, *args, **options):
+        if min(options['requests'], options['concurrency']) < 1:
+            raise CommandError('Requests and concurrency must be positive.')
+        baseline = self.load_baseline(options['compare'])
+        try:
+            selected = self.select(scenarios(), options['scenarios'])
+        except ValueError as error:
+            raise CommandError(error)
+        modes = MODES if options['mode'] == 'both' else (options['mode'],)
+        results = {}
+        try:
+            for mode in modes:
+                results[mode] = self.run_mode(mode, selected, options)
+        finally:
+            delete_bench_users()
+        report = {
+            'commit': git_commit(),
+            'created': timezone.now().isoformat(),
+            'dataset': dataset(),
+            'options': {
+                name: options[name]
+                for name in ('requests', 'warmup', 'concurrency', 'no_cache')
+            },
+            'results': results,
+        }
+        if options['output']:
+            options['output'].write_text(json.dumps(report, indent=2) + '\n')
+            self.stdout.write(f'Results written to {options["output"]}')
+        if baseline is not None:
+            self.compare(results, baseline, options['max_regression'])
+
+    @staticmethod
+    def load_baseline(path):
+        if path is None:
+            return None
+        try:
+            return json.loads(path.read_text())['results']
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f'Cannot read {path}: {error}')
+
+    @staticmethod
+    def select(available, names):
+        unknown = set(names or ()) - set(available)
+        if unknown:
+            raise CommandError(
+                f'Unknown scenarios: {", ".join(sorted(unknown))}. '
+                f'Available: {", ".join(available)}.')
+        return {name: scenario for name, scenario in available.items()
+                if not names or name in names}
+
+    def run_mode(self, mode, selected, options):
+        if mode == HTTP:
+            runner = self.run_http
+            settings_override = nullcontext()
+        else:
+            runner = self.run_in_process
+            # Every request comes from the same address, so the limits of
+            # the auth endpoints are raised out of reach, not switched off.
+            overrides = {
+                'ALLOWED_HOSTS': ['*'],
+                'THROTTLE_RATE_MULTIPLIER': THROTTLE_RATE_MULTIPLIER,
+            }
+            if options['no_cache']:
+                caches = dict(settings.CACHES)
+                caches['benchmark'] = {
+                    'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+                overrides.update(CACHES=caches,
+                                 RESPONSE_CACHE_ALIAS='benchmark')
+            settings_override = override_settings(**overrides)
+        results = {}
+        with settings_override:
+            for name, scenario in selected.items():
+                delete_bench_users()
+                runner(scenario, range(options['warmup']), options)
+                results[name] = runner(
+                    scenario,
+                    range(options['warmup'],
+                          options['warmup'] + options['requests']),
+                    options
+                )
+                self.print_summary(mode, name, results[name])
+        return results
+
+    @staticmethod
+    def run_in_process(scenario, numbers, options):
+        client = Client()
+
+        def send(method, path, data=None):
+            response = getattr(client, method)(f'{API_ROOT}{path}', data)
+            if response.status_code != 200:
+                raise RequestFailed(f'{path}: HTTP {response.status_code}')
+
+        latencies = []
+        queries = []
+        errors = 0
+        started = perf_counter()
+        for number in numbers:
+            request_started = perf_counter()
+            try:
+                with timing() as request_timing:
+                    scenario(send, number)
+            except RequestFailed:
+                errors += 1
+                continue
+            latencies.append(perf_counter() - request_started)
+            queries.append(request_timing.queries)
+        return summarize(latencies, errors, perf_counter() - started,
+                         queries)
+
+    @staticmethod
+    def run_http(scenario, numbers, options):
+        sessions = local()
+        base_url = options['base_url'].rstrip('/')
+
+        def send(method, path, data=None):
+            if not hasattr(sessions, 'session'):
+                sessions.session = requests.Session()
+            response = sessions.session.request(
+                method, f'{base_url}/{path}', json=data)
+            if response.status_code == 429:
+                raise CommandError(
+                    f'{path} was throttled; run the server with '
+                    f'THROTTLE_RATE_MULTIPLIER={THROTTLE_RATE_MULTIPLIER}.')
+            if response.status_code != 200:
+                raise RequestFailed(f'{path}: HTTP {response.status_code}')
+
+        def measure(number):
+            started = perf_counter()
+            try:
+                scenario(send, number)
+            except (RequestFailed, requests.RequestException):
+                return None
+            return perf_counter() - started
+
+        started = perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            measured = list(pool.map(measure, numbers))
+        elapsed = perf_counter() - started
+        latencies = [latency for latency in measured if latency is not None]
+        return summarize(latencies, len(measured) - len(latencies), elapsed)
+
+    def print_summary(self, mode, name, summary):
+        line = (f'{mode} {name}: {summary["rps"]:.0f} req/s, '
+                f'{summary["errors"]} errors')
+        if 'p50_ms' in summary:
+            line += (f', p50 {summary["p50_ms"]:.1f} ms, '
+                     f'p90 {summary["p90_ms"]:.1f} ms, '
+                     f'p99 {summary["p99_ms"]:.1f} ms')
+        if 'queries' in summary:
+            line += f', {summary["queries"]:g} queries'
+        self.stdout.write(line)
+
+    def compare(self, results, baseline, max_regression):
+        found = list(regressions(results, baseline, max_regression))
+        if found:
+            raise CommandError(
+                f'Slower than the baseline by more than {max_regression}%:\n'
+                + '\n'.join(found))
+        self.stdout.write(self.style.SUCCESS(
+            f'No scenario regressed by more than {max_regression}%'))
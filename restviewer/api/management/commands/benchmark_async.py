@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import local
+from time import perf_counter
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import percentile
+
+DEFAULT_PATHS = (
+    'titles/',
+    'titles/1/',
+    'titles/1/reviews/',
+    'categories/',
+    'genres/',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the sync and async read endpoints of a running server '
+        'under concurrent load'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url',
+            default='http://127.0.0.1:8000/api/v1/',
+            help='API root of a server started with an ASGI server, '
+                 'e.g. uvicorn restviewer.asgi:application.'
+        )
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument(
+            '--path',
+            action='append',
+            dest='paths',
+            help='Path relative to the API root; can be repeated.'
+        )
+
+    def handle(self, *args, **options):
+        sessions = local()
+
+        def fetch(url):
+            if not hasattr(sessions, 'session'):
+                sessions.session = requests.Session()
+            started = perf_counter()
+            response = sessions.session.get(url)
+            if response.status_code != 200:
+                raise CommandError(f'{url}: HTTP {response.status_code}')
+            return perf_counter() - started
+
+        base_url = options['base_url'].rstrip('/')
+        for path in options['paths'] or DEFAULT_PATHS:
+            for mode, prefix in (('sync', ''), ('async', '/async')):
+                url = f'{base_url}{prefix}/{path}'
+                with ThreadPoolExecutor(options['concurrency']) as pool:
+                    started = perf_counter()
+                    latencies = list(pool.map(
+                        fetch, [url] * options['requests']))
+                    elapsed = perf_counter() - started
+                self.stdout.write(
+                    f'{path} {mode}: '
+                    f'{len(latencies) / elapsed:.0f} req/s, '
+                    f'p50 {percentile(latencies, 0.5) * 1000:.1f} ms, '
+                    f'p99 {percentile(latencies, 0.99) * 1000:.1f} ms'
+                )
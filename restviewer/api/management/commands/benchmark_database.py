@@ -0,0 +1,195 @@
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import sys
+from random import Random
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep, time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError
+from django.test import Client
+from django.test.utils import override_settings
+
+from api.authentication import RoleAccessToken
+from api.benchmarks import summarize
+from reviews.models import CustomUser, Title
+
+API_ROOT = '/api/v1/'
+WORKER_USERNAME = 'benchmark-db-'
+# Time the workers get to start Django before the measurement begins.
+STARTUP_SECONDS = 5
+
+
+def copy_database(target):
+    """Copy the database to ``target`` in rollback journal mode, so every
+    profile starts from the same file and sets its own journal mode."""
+    source = sqlite3.connect(settings.DATABASES['default']['NAME'])
+    copy = sqlite3.connect(target)
+    try:
+        source.backup(copy)
+        copy.execute('PRAGMA journal_mode=DELETE')
+    finally:
+        copy.close()
+        source.close()
+
+
+class Worker:
+    """Mixed reads and review posts of one process, sent through the
+    test client so they take the whole request path."""
+
+    def __init__(self, number, write_share):
+        self.random = Random(number)
+        self.write_share = write_share
+        user, _ = CustomUser.objects.get_or_create(
+            username=f'{WORKER_USERNAME}{number}',
+            defaults={'email': f'{WORKER_USERNAME}{number}@benchmark.invalid'}
+        )
+        self.client = Client(HTTP_AUTHORIZATION=(
+            f'Bearer {RoleAccessToken.for_user(user)}'))
+        self.titles = list(Title.objects.values_list('pk', flat=True))
+        self.unreviewed = self.titles.copy()
+        self.random.shuffle(self.unreviewed)
+        self.results = {
+            kind: {'latencies': [], 'errors': 0, 'locked': 0}
+            for kind in ('read', 'write')
+        }
+
+    def request(self):
+        if self.unreviewed and self.random.random() < self.write_share:
+            return 'write', 201, lambda: self.client.post(
+                f'{API_ROOT}titles/{self.unreviewed.pop()}/reviews/',
+                {'text': 'Benchmark review.',
+                 'score': self.random.randint(1, 10)})
+        title = self.random.choice(self.titles)
+        path = self.random.choice(('', 'reviews/'))
+        return 'read', 200, lambda: self.client.get(
+            f'{API_ROOT}titles/{title}/{path}')
+
+    def run(self, until):
+        while time() < until:
+            kind, expected, send = self.request()
+            result = self.results[kind]
+            started = perf_counter()
+            try:
+                status = send().status_code
+            except OperationalError:
+                result['locked'] += 1
+                continue
+            if status != expected:
+                result['errors'] += 1
+                continue
+            result['latencies'].append(perf_counter() - started)
+        return self.results
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures mixed read and review write throughput of concurrent '
+        'worker processes on a copy of the database, per database profile'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profile',
+            action='append',
+            dest='profiles',
+            choices=tuple(settings.DATABASE_PROFILES),
+            help='Database profile to measure; can be repeated. '
+                 'Measures all by default.'
+        )
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=10,
+            help='Seconds every worker sends requests for.'
+        )
+        parser.add_argument(
+            '--write-share',
+            type=float,
+            default=0.2,
+            help='Share of requests that post a review.'
+        )
+        parser.add_argument(
+            '--output',
+            help='File the results are written to as JSON.'
+        )
+        parser.add_argument('--worker', type=int, help='Internal.')
+        parser.add_argument('--start', type=float, help='Internal.')
+
+    def handle(self, *args, **options):
+        if options['worker'] is not None:
+            return self.run_worker(options)
+        if options['workers'] < 1 or options['duration'] <= 0:
+            raise CommandError('Workers and duration must be positive.')
+        if not Title.objects.exists():
+            raise CommandError(
+                'Generate or import a catalog before running benchmarks.')
+        results = {}
+        for profile in options['profiles'] or settings.DATABASE_PROFILES:
+            results[profile] = self.measure(profile, options)
+            self.print_summary(profile, results[profile])
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+                output.write('\n')
+            self.stdout.write(f'Results written to {options["output"]}')
+
+    def run_worker(self, options):
+        # Failed requests are counted, not logged with their tracebacks.
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        with override_settings(ALLOWED_HOSTS=['*']):
+            worker = Worker(options['worker'], options['write_share'])
+            sleep(max(0, options['start'] - time()))
+            results = worker.run(options['start'] + options['duration'])
+        return json.dumps(results)
+
+    def measure(self, profile, options):
+        with TemporaryDirectory() as directory:
+            database = os.path.join(directory, 'db.sqlite3')
+            copy_database(database)
+            env = dict(os.environ, DATABASE_PROFILE=profile,
+                       DATABASE_NAME=database)
+            start = time() + STARTUP_SECONDS
+            workers = [
+                subprocess.Popen(
+                    (sys.executable, str(settings.BASE_DIR / 'manage.py'),
+                     'benchmark_database', '--worker', str(number),
+                     '--start', str(start),
+                     '--duration', str(options['duration']),
+                     '--write-share', str(options['write_share'])),
+                    env=env, stdout=subprocess.PIPE, text=True)
+                for number in range(options['workers'])
+            ]
+            outputs = [worker.communicate()[0] for worker in workers]
+        if any(worker.returncode for worker in workers):
+            raise CommandError(f'A worker of the {profile} profile failed.')
+        return self.combine(
+            [json.loads(output) for output in outputs], options['duration'])
+
+    @staticmethod
+    def combine(outputs, duration):
+        summary = {}
+        for kind in ('read', 'write'):
+            results = [output[kind] for output in outputs]
+            latencies = [latency for result in results
+                         for latency in result['latencies']]
+            locked = sum(result['locked'] for result in results)
+            errors = sum(result['errors'] for result in results)
+            summary[kind] = summarize(latencies, errors + locked, duration)
+            summary[kind]['locked'] = locked
+        return summary
+
+    def print_summary(self, profile, summary):
+        for kind, result in summary.items():
+            line = (f'{profile} {kind}: {result["rps"]:.0f} req/s, '
+                    f'{result["errors"]} errors '
+                    f'({result["locked"]} database is locked)')
+            if 'p50_ms' in result:
+                line += (f', p50 {result["p50_ms"]:.1f} ms, '
+                         f'p99 {result["p99_ms"]:.1f} ms')
+            self.stdout.write(line)
@@ -0,0 +1,78 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from api.benchmarks import percentile
+from api.renderers import FastJSONRenderer, orjson
+
+API_ROOT = '/api/v1/'
+ENCODERS = ('json', 'orjson') if orjson is not None else ('json',)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares JSON rendering of an API response with DRF\'s renderer '
+        'and with each encoder of FastJSONRenderer'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default='titles/?limit=1000',
+            help='Path relative to the API root.'
+        )
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('Repeat must be positive.')
+        if orjson is None:
+            self.stdout.write('orjson is not installed; only the standard '
+                              'library encoder is measured.')
+        path = f'{API_ROOT}{options["path"]}'
+        with override_settings(ALLOWED_HOSTS=['*']):
+            client = Client()
+            response = client.get(path)
+            if response.status_code != 200:
+                raise CommandError(f'{path}: HTTP {response.status_code}')
+            expected = JSONRenderer().render(response.data)
+            self.stdout.write(f'{path}: {len(expected)} bytes')
+            self.report('drf', self.render(
+                JSONRenderer(), response.data, options['repeat'])[1])
+            for encoder in ENCODERS:
+                with override_settings(JSON_ENCODER=encoder):
+                    rendered, times = self.render(
+                        FastJSONRenderer(), response.data, options['repeat'])
+                    if rendered != expected:
+                        raise CommandError(
+                            f'{encoder}: output differs from JSONRenderer.')
+                    self.report(f'fast/{encoder}', times, self.request_times(
+                        client, path, options['repeat']))
+
+    @staticmethod
+    def render(renderer, data, repeat):
+        times = []
+        for _ in range(repeat):
+            started = perf_counter()
+            rendered = renderer.render(data)
+            times.append(perf_counter() - started)
+        return rendered, times
+
+    @staticmethod
+    def request_times(client, path, repeat):
+        times = []
+        for _ in range(repeat):
+            started = perf_counter()
+            client.get(path)
+            times.append(perf_counter() - started)
+        return times
+
+    def report(self, name, times, requests=None):
+        line = f'{name}: render p50 {percentile(times, 0.5) * 1000:.2f} ms'
+        if requests:
+            line += (f', whole request p50 '
+                     f'{percentile(requests, 0.5) * 1000:.1f} ms')
+        self.stdout.write(line)
@@ -0,0 +1,33 @@
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.search import ContainsSearch, FullTextSearch, fts_available
+
+
+class Command(BaseCommand):
+    help = 'Compares FTS5 search with the icontains search path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='+')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--limit', type=int, default=10)
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError('FTS5 search tables are not installed.')
+        for query in options['queries']:
+            for backend in (ContainsSearch, FullTextSearch):
+                timings = []
+                for _ in range(options['repeat']):
+                    started = perf_counter()
+                    results = backend(query)
+                    count = results.count()
+                    results[0:options['limit']]
+                    timings.append(perf_counter() - started)
+                self.stdout.write(
+                    f'{query!r} {backend.__name__}: {count} matches, '
+                    f'median {median(timings) * 1000:.2f} ms, '
+                    f'max {max(timings) * 1000:.2f} ms'
+                )
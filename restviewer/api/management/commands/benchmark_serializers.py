@@ -0,0 +1,81 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from api.serializers import (
+    CommentSerializer,
+    ReviewSerializer,
+    TitleReadOnlySerializer
+)
+from reviews.models import Comment, Review, Title
+
+PATHS = (('drf', False), ('fast', True))
+
+
+def querysets():
+    return {
+        'titles': (
+            Title.objects.select_related('category').prefetch_related(
+                'genre'),
+            TitleReadOnlySerializer
+        ),
+        'reviews': (Review.objects.select_related('author'),
+                    ReviewSerializer),
+        'comments': (Comment.objects.select_related('author'),
+                     CommentSerializer),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures serialization time of titles, reviews and comments per '
+        '1000 objects on the DRF and the fast path, and checks that both '
+        'render the same JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--objects',
+            type=int,
+            default=1000,
+            help='Objects of each kind serialized per run.'
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if min(options['objects'], options['repeat']) < 1:
+            raise CommandError('Objects and repeat must be positive.')
+        for kind, (queryset, serializer_class) in querysets().items():
+            objects = list(queryset.order_by('pk')[:options['objects']])
+            if not objects:
+                self.stdout.write(f'{kind}: no objects, skipped')
+                continue
+            rendered = {}
+            timings = {}
+            for name, fast in PATHS:
+                with override_settings(FAST_SERIALIZERS=fast):
+                    timings[name], rendered[name] = self.measure(
+                        serializer_class, objects, options['repeat'])
+            if rendered['drf'] != rendered['fast']:
+                raise CommandError(f'{kind}: the fast path renders '
+                                   f'different JSON.')
+            per_thousand = {name: seconds / len(objects) * 1000 * 1000
+                            for name, seconds in timings.items()}
+            self.stdout.write(
+                f'{kind}: drf {per_thousand["drf"]:.1f} ms, '
+                f'fast {per_thousand["fast"]:.1f} ms per 1000 objects '
+                f'({per_thousand["drf"] / per_thousand["fast"]:.1f}x), '
+                f'identical JSON')
+
+    @staticmethod
+    def measure(serializer_class, objects, repeat):
+        """Return the best time of ``repeat`` runs and the JSON output."""
+        best = None
+        for _ in range(repeat):
+            started = perf_counter()
+            data = serializer_class(objects, many=True).data
+            elapsed = perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, JSONRenderer().render(data)
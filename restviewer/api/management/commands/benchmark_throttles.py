@@ -0,0 +1,66 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.benchmarks import THROTTLE_RATE_MULTIPLIER
+from api.throttling import IPThrottle, UsernameThrottle
+
+STORES = (
+    ('local', 'api.throttling.LocalCounterStore'),
+    ('cache', 'api.throttling.CacheCounterStore'),
+)
+
+
+class BenchmarkView:
+    throttle_scope = 'signup'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures the time the auth endpoint throttles add to a request '
+        'that stays under the limits, per counter store'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('Requests must be positive.')
+        factory = APIRequestFactory()
+        requests = []
+        for number in range(options['requests']):
+            request = Request(
+                factory.post('/', {'username': f'benchmark{number}'},
+                             format='json'),
+                parsers=[JSONParser()]
+            )
+            request.data
+            requests.append(request)
+        with override_settings(REST_FRAMEWORK={}):
+            baseline = self.measure(requests)
+        self.stdout.write(
+            f'no limits: {baseline * 1e6:.2f} us per request')
+        for name, path in STORES:
+            with override_settings(
+                    THROTTLE_RATE_MULTIPLIER=THROTTLE_RATE_MULTIPLIER,
+                    THROTTLE_STORE=path):
+                elapsed = self.measure(requests)
+            self.stdout.write(
+                f'{name} store: {elapsed * 1e6:.2f} us per request '
+                f'(+{(elapsed - baseline) * 1e6:.2f} us)')
+
+    @staticmethod
+    def measure(requests):
+        """Return the mean time both throttles take to allow a request."""
+        view = BenchmarkView()
+        started = perf_counter()
+        for request in requests:
+            for throttle in (IPThrottle(), UsernameThrottle()):
+                if not throttle.allow_request(request, view):
+                    raise CommandError('A benchmark request was throttled.')
+        return (perf_counter() - started) / len(requests)
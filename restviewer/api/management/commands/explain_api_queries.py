@@ -0,0 +1,113 @@
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from reviews.models import Category, Comment, Genre, Title
+
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)$')
+SORT = re.compile(r'^USE TEMP B-TREE FOR (?:RIGHT PART OF )?ORDER BY$')
+TITLES = 'reviews_title'
+LEADERBOARD = 'reviews_leaderboardentry'
+
+
+def api_requests():
+    """Return ``(url, tables that must not be fully scanned)`` pairs.
+
+    No query may sort rows itself: orderings have to come from indexes.
+    """
+    comment = Comment.objects.select_related('review').first()
+    title = Title.objects.filter(year__isnull=False).first()
+    category = Category.objects.first()
+    genre = Genre.objects.first()
+    if not (comment and title and category and genre):
+        raise CommandError(
+            'Import the sample database before explaining queries.')
+    review = comment.review
+    feeds = ('reviews_review', 'reviews_comment')
+    titles = f'/api/v1/titles/{review.title_id}'
+    comments = f'{titles}/reviews/{review.id}/comments'
+    return (
+        ('/api/v1/titles/', ()),
+        (f'/api/v1/titles/?year={title.year}', (TITLES,)),
+        (f'/api/v1/titles/?name={title.name}', (TITLES,)),
+        (f'/api/v1/titles/?category={category.slug}', (TITLES,)),
+        (f'/api/v1/titles/?genre={genre.slug}', ()),
+        (f'/api/v1/titles/?year__gte={title.year}&year__lte={title.year}',
+         (TITLES,)),
+        ('/api/v1/titles/?ordering=year', ()),
+        ('/api/v1/titles/?ordering=-name', ()),
+        ('/api/v1/titles/?ordering=-rating', ()),
+        ('/api/v1/titles/?rating__gte=9&ordering=rating', (TITLES,)),
+        ('/api/v1/titles/?ordering=-review_count', ()),
+        (f'{titles}/', (TITLES,)),
+        (f'{titles}/reviews/', feeds),
+        (f'{titles}/reviews/?pagination=cursor', feeds),
+        (f'{titles}/reviews/{review.id}/', feeds),
+        (f'{comments}/', feeds),
+        (f'{comments}/?pagination=cursor', feeds),
+        (f'{comments}/{comment.id}/', feeds),
+        ('/api/v1/leaderboards/', (LEADERBOARD,)),
+        (f'/api/v1/leaderboards/genre/{genre.slug}/', (LEADERBOARD,)),
+        (f'/api/v1/leaderboards/year/{title.year}/', (LEADERBOARD,)),
+    )
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class Command(BaseCommand):
+    help = 'Prints SQLite query plans of the main API read queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Fail when a query scans a table that should be read '
+                 'through an index, or sorts rows an index could order.'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Query plans are only explained on SQLite.')
+        caches = dict(settings.CACHES)
+        caches['explain'] = {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+        failures = []
+        with override_settings(CACHES=caches,
+                               RESPONSE_CACHE_ALIAS='explain',
+                               ALLOWED_HOSTS=['*']):
+            client = Client()
+            for url, indexed in api_requests():
+                failures.extend(self.explain(client, url, indexed))
+        if failures:
+            message = '\n'.join(failures)
+            if options['check']:
+                raise CommandError(
+                    f'Full table scans or sorts found:\n{message}')
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('All queries use indexes'))
+
+    def explain(self, client, url, indexed):
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url)
+        self.stdout.write(self.style.MIGRATE_HEADING(url))
+        failures = []
+        for query in queries.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            self.stdout.write(f'  {query["sql"]}')
+            for step in query_plan(query['sql']):
+                self.stdout.write(f'    {step}')
+                scan = FULL_SCAN.match(step)
+                if ((scan and scan.group(1) in indexed)
+                        or SORT.match(step)):
+                    failures.append(f'{url}: {step}')
+        return failures
@@ -0,0 +1,32 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Copies the default SQLite database over every read replica, '
+        'standing in for replication in local setups'
+    )
+
+    def handle(self, *args, **options):
+        if not settings.READ_REPLICAS:
+            raise CommandError('Set DATABASE_REPLICAS to add replicas.')
+        databases = settings.DATABASES
+        if any(connections[alias].vendor != 'sqlite'
+               for alias in ('default', *settings.READ_REPLICAS)):
+            raise CommandError('Only SQLite databases can be copied.')
+        source = sqlite3.connect(databases['default']['NAME'])
+        try:
+            for alias in settings.READ_REPLICAS:
+                replica = sqlite3.connect(databases[alias]['NAME'])
+                try:
+                    source.backup(replica)
+                finally:
+                    replica.close()
+                self.stdout.write(
+                    f'Copied to {alias} ({databases[alias]["NAME"]})')
+        finally:
+            source.close()
@@ -0,0 +1,196 @@
+"""Request timings collected by ``api.middleware.InstrumentationMiddleware``.
+
+Every sampled request adds its wall time, database query count, database
+time and serializer time to fixed-bucket histograms labelled with the
+view and action that handled it. Memory use therefore depends on the
+number of views, not on traffic. The histograms are exported in the
+Prometheus text format, next to a counter of their queries per
+database alias.
+"""
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+
+
+SECONDS_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+METRICS = (
+    ('request_duration_seconds', 'Wall time of sampled requests.',
+     SECONDS_BUCKETS),
+    ('db_queries', 'Database queries per sampled request.', QUERY_BUCKETS),
+    ('db_duration_seconds', 'Database time of sampled requests.',
+     SECONDS_BUCKETS),
+    ('serializer_duration_seconds',
+     'Serializer time of sampled requests, queries it runs included.',
+     SECONDS_BUCKETS),
+)
+ALIAS_QUERIES = (
+    'db_alias_queries_total',
+    'Database queries of sampled requests per database alias.'
+)
+PREFIX = 'restviewer_'
+
+current_timing = ContextVar('current_timing', default=None)
+
+
+class Histogram:
+    """Counts of observations at or below each bucket bound."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self):
+        """Yield ``(le, cumulative count)`` pairs, ``+Inf`` last."""
+        total = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            total += count
+            yield bound, total
+
+
+_histograms = {}
+_alias_queries = Counter()
+_histograms_lock = Lock()
+
+
+class Timing:
+    """Time spent by one request, filled in while it is handled."""
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.queries = 0
+        self.alias_queries = Counter()
+        self.db = 0
+        self.serializer = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += perf_counter() - started
+            self.queries += 1
+            self.alias_queries[context['connection'].alias] += 1
+
+    def timed(self, method):
+        """Wrap a serializer method to add its run time to the request."""
+        def timed(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.serializer += perf_counter() - started
+        return timed
+
+    def values(self):
+        """Return the measurements in the order of ``METRICS``."""
+        return (perf_counter() - self.started, self.queries, self.db,
+                self.serializer)
+
+
+def server_timing(values):
+    """Format measurements as a ``Server-Timing`` header value."""
+    total, queries, db, serializer = values
+    return (
+        f'total;dur={total * 1000:.1f}, '
+        f'db;dur={db * 1000:.1f};desc="{queries} queries", '
+        f'serializer;dur={serializer * 1000:.1f}'
+    )
+
+
+def count_query(execute, sql, params, many, context):
+    """Execute wrapper adding a query to the ``Timing`` of the request
+    running it, if that request is sampled."""
+    request_timing = current_timing.get()
+    if request_timing is None:
+        return execute(sql, params, many, context)
+    return request_timing(execute, sql, params, many, context)
+
+
+def watch_queries(connection):
+    """Count the queries of ``connection`` towards sampled requests.
+
+    The request ``Timing`` is read from the context, which
+    ``sync_to_async`` carries into the thread that runs the queries.
+    The wrapper goes first, so that ``execute_wrapper`` blocks open when
+    the connection was made still pop their own.
+    """
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_query)
+
+
+@contextmanager
+def timing():
+    """Collect a ``Timing`` for the code run inside the block."""
+    request_timing = Timing()
+    token = current_timing.set(request_timing)
+    try:
+        yield request_timing
+    finally:
+        current_timing.reset(token)
+
+
+def record(view, action, values, alias_queries=None):
+    labels = (view, action)
+    with _histograms_lock:
+        for alias, queries in (alias_queries or {}).items():
+            _alias_queries[(*labels, alias)] += queries
+        histograms = _histograms.get(labels)
+        if histograms is None:
+            histograms = _histograms[labels] = [
+                Histogram(buckets) for name, help_text, buckets in METRICS]
+        for histogram, value in zip(histograms, values):
+            histogram.observe(value)
+
+
+def time_serializer(serializer):
+    """Count validation and output of a serializer towards the request."""
+    request_timing = current_timing.get()
+    if request_timing is not None:
+        serializer.run_validation = request_timing.timed(
+            serializer.run_validation)
+        serializer.to_representation = request_timing.timed(
+            serializer.to_representation)
+    return serializer
+
+
+def export():
+    """Return all histograms in the Prometheus text exposition format."""
+    with _histograms_lock:
+        series = {
+            labels: [(list(histogram.samples()), histogram.sum)
+                     for histogram in histograms]
+            for labels, histograms in sorted(_histograms.items())
+        }
+        alias_queries = sorted(_alias_queries.items())
+    lines = []
+    for position, (name, help_text, buckets) in enumerate(METRICS):
+        name = PREFIX + name
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for (view, action), histograms in series.items():
+            samples, total = histograms[position]
+            labels = f'view="{view}",action="{action}"'
+            for bound, count in samples:
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} '
+                             f'{count}')
+            lines.append(f'{name}_sum{{{labels}}} {total}')
+            lines.append(f'{name}_count{{{labels}}} {samples[-1][1]}')
+    name, help_text = ALIAS_QUERIES
+    name = PREFIX + name
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} counter')
+    for (view, action, alias), queries in alias_queries:
+        lines.append(f'{name}{{view="{view}",action="{action}",'
+                     f'alias="{alias}"}} {queries}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,128 @@
+import asyncio
+from random import choice, random
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.permissions import SAFE_METHODS
+
+from api.metrics import record, server_timing, timing
+from api.replicas import REPLICA_ACTIONS, current_replica, is_pinned, pin
+
+
+class AsyncCapableMiddleware:
+    """Run in the mode of the rest of the chain, like ``MiddlewareMixin``,
+    so that async views keep the event loop under ASGI."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return self.handle(request)
+
+    async def __acall__(self, request):
+        raise NotImplementedError
+
+    def handle(self, request):
+        raise NotImplementedError
+
+
+def view_labels(request, view_func):
+    """Return ``(view, action)`` names of the view handling a request."""
+    view = getattr(view_func, 'cls', view_func)
+    method = request.method.lower()
+    actions = getattr(view_func, 'actions', None) or {}
+    return view.__name__, actions.get(method, method)
+
+
+class InstrumentationMiddleware(AsyncCapableMiddleware):
+    """Time a sample of requests and report it in ``Server-Timing``.
+
+    ``INSTRUMENTATION_SAMPLE_RATE`` is the share of requests measured;
+    with 0 the middleware removes itself from the chain. Measurements go
+    to the histograms of ``api.metrics``.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.sample_rate = settings.INSTRUMENTATION_SAMPLE_RATE
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+
+    def handle(self, request):
+        if random() >= self.sample_rate:
+            return self.get_response(request)
+        with timing() as request_timing:
+            response = self.get_response(request)
+        return self.report(request, request_timing, response)
+
+    async def __acall__(self, request):
+        if random() >= self.sample_rate:
+            return await self.get_response(request)
+        with timing() as request_timing:
+            response = await self.get_response(request)
+        return self.report(request, request_timing, response)
+
+    def report(self, request, request_timing, response):
+        values = request_timing.values()
+        view, action = getattr(request, 'instrumented_view',
+                               ('unresolved', request.method.lower()))
+        record(view, action, values, request_timing.alias_queries)
+        response['Server-Timing'] = server_timing(values)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.instrumented_view = view_labels(request, view_func)
+
+
+class ReplicaRoutingMiddleware(AsyncCapableMiddleware):
+    """Read from a replica while serving catalog lists and details.
+
+    Views opt in with ``read_replica = True``. Without ``READ_REPLICAS``
+    the middleware removes itself from the chain.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if not settings.READ_REPLICAS:
+            raise MiddlewareNotUsed
+
+    def handle(self, request):
+        token = current_replica.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_replica.reset(token)
+        return self.pin_writer(request, response)
+
+    async def __acall__(self, request):
+        token = current_replica.set(None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_replica.reset(token)
+        return self.pin_writer(request, response)
+
+    def pin_writer(self, request, response):
+        credentials = request.META.get('HTTP_AUTHORIZATION')
+        if (credentials and request.method not in SAFE_METHODS
+                and response.status_code < 400):
+            pin(credentials)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'cls', None)
+        actions = getattr(view_func, 'actions', None) or {}
+        if (not getattr(view, 'read_replica', False)
+                or request.method not in SAFE_METHODS
+                or actions.get(request.method.lower()) not in REPLICA_ACTIONS):
+            return
+        credentials = request.META.get('HTTP_AUTHORIZATION')
+        if credentials and is_pinned(credentials):
+            return
+        current_replica.set(choice(settings.READ_REPLICAS))
@@ -0,0 +1,57 @@
+from django.db import migrations
+
+SEARCH_TABLES = (
+    ('title_search', 'reviews_title', ('name', 'description')),
+    ('review_search', 'reviews_review', ('text',)),
+    ('comment_search', 'reviews_comment', ('text',)),
+)
+
+
+def create_statements(index, table, columns):
+    names = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    delete = (
+        f"INSERT INTO {index}({index}, rowid, {names}) "
+        f"VALUES ('delete', old.id, {old});"
+    )
+    insert = f'INSERT INTO {index}(rowid, {names}) VALUES (new.id, {new});'
+    return (
+        f"CREATE VIRTUAL TABLE {index} USING fts5("
+        f"{names}, content='{table}', content_rowid='id');",
+        f'CREATE TRIGGER {index}_insert AFTER INSERT ON {table} '
+        f'BEGIN {insert} END;',
+        f'CREATE TRIGGER {index}_delete AFTER DELETE ON {table} '
+        f'BEGIN {delete} END;',
+        f'CREATE TRIGGER {index}_update AFTER UPDATE OF {names} ON {table} '
+        f'BEGIN {delete} {insert} END;',
+        f"INSERT INTO {index}({index}) VALUES ('rebuild');",
+    )
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for index, table, columns in SEARCH_TABLES:
+        for statement in create_statements(index, table, columns):
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for index, table, columns in SEARCH_TABLES:
+        for action in ('insert', 'delete', 'update'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {index}_{action};')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {index};')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_title_modified'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
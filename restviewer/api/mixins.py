@@ -1,18 +1,181 @@
 import re
 
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from rest_framework.exceptions import ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
 
-from rest_framework import filters, mixins, permissions, viewsets
+from rest_framework import (
+    filters,
+    mixins,
+    permissions,
+    serializers,
+    status,
+    viewsets
+)
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
+from api.cache import get_response_data, set_response_data
+from api.metrics import time_serializer
+from api.replicas import current_replica
 from api.permissions import (
     IsAdmin,
     IsModerator,
     IsOwnerOrReadOnly,
 )
 
+PAGINATION_PARAMS = (
+    'limit_query_param',
+    'offset_query_param',
+    'page_query_param',
+    'page_size_query_param',
+    'cursor_query_param',
+)
+
+
+class TimedSerializerMixin:
+    """Report serializer time to ``InstrumentationMiddleware``."""
+
+    def get_serializer(self, *args, **kwargs):
+        return time_serializer(super().get_serializer(*args, **kwargs))
+
+
+class CachedResponseMixin:
+    """Serve GET responses from the response cache.
+
+    Entries are keyed by path and the query parameters the view reads
+    (``get_cache_params``) and belong to ``cache_group``, whose version
+    is bumped by ``api.signals`` whenever the underlying rows change.
+    Responses read from a replica are not stored: they may predate a
+    write that already bumped the version.
+    """
+    cache_group = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def get_cache_params(self):
+        """Return the query parameters of filters, search and pagination;
+        any other parameter leaves the response unchanged."""
+        filterset_class = getattr(self, 'filterset_class', None)
+        params = set(filterset_class.base_filters if filterset_class else ())
+        if filters.SearchFilter in self.filter_backends:
+            params.add(api_settings.SEARCH_PARAM)
+        if filters.OrderingFilter in self.filter_backends:
+            params.add(api_settings.ORDERING_PARAM)
+        params.update(filter(None, (
+            getattr(self.paginator, name, None) for name in PAGINATION_PARAMS
+        )))
+        return params
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        params = self.get_cache_params()
+        version, data = get_response_data(self.cache_group, request, params)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if (response.status_code == status.HTTP_200_OK
+                and current_replica.get() is None):
+            set_response_data(self.cache_group, request, params, version,
+                              response.data)
+        return response
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+
+class BulkWriteMixin:
+    """Create or partially update a list of objects in one request.
+
+    POST creates every item of the payload and PATCH changes the objects
+    named by the ``id`` of each item. The list serializer of the view's
+    serializer class does the writing; nothing is written unless every
+    item is valid.
+    """
+
+    @action(detail=False, methods=('post', 'patch'),
+            permission_classes=(IsAdmin,))
+    def bulk(self, request, *args, **kwargs):
+        if request.method == 'POST':
+            serializer = self.get_serializer(data=request.data, many=True)
+        else:
+            serializer = self.get_serializer(
+                self.get_bulk_instances(request.data),
+                data=request.data,
+                many=True,
+                partial=True
+            )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        if request.method == 'POST':
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.data)
+
+    def get_bulk_instances(self, data):
+        if not isinstance(data, list):
+            return {}
+        # Read ids like the id field of the items will, which takes "5".
+        field = serializers.IntegerField()
+        ids = []
+        for item in data:
+            if isinstance(item, dict) and 'id' in item:
+                try:
+                    ids.append(field.to_internal_value(item['id']))
+                except ValidationError:
+                    pass
+        return self.get_queryset().in_bulk(ids)
+
+
+class ConditionalGetMixin:
+    """Answer GET requests with 304 when the client copy is current.
+
+    ``get_modified`` returns ``(last_modified, version)`` for the data
+    behind the response, or ``None`` to skip the check; ``last_modified``
+    may be ``None`` when only a version is known. It has to be much
+    cheaper than building the response, so it reads change timestamps or
+    cache versions instead of serializing anything.
+    """
+
+    def get_modified(self):
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        modified = self.get_modified()
+        if modified is None:
+            return handler(request, *args, **kwargs)
+        last_modified, version = modified
+        etag = quote_etag(f'{request.accepted_renderer.format}-{version}')
+        timestamp = (None if last_modified is None
+                     else int(last_modified.timestamp()))
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK,
+                                    status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
 
 class AdminPermissionViewSet(
+    TimedSerializerMixin,
+    CachedResponseMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     mixins.ListModelMixin,
@@ -22,19 +185,21 @@ class AdminPermissionViewSet(
         permissions.DjangoModelPermissionsOrAnonReadOnly | IsAdmin,
     )
     http_method_names = ('get', 'post', 'patch', 'delete')
+    read_replica = True
     filter_backends = (
         DjangoFilterBackend,
         filters.SearchFilter
     )
 
 
-class OwnerPermissionViewSet(viewsets.ModelViewSet):
+class OwnerPermissionViewSet(TimedSerializerMixin, viewsets.ModelViewSet):
     permission_classes = (
-        permissions.DjangoModelPermissionsOrAnonReadOnly
-        | permissions.IsAuthenticated,
+        permissions.IsAuthenticated
+        | permissions.DjangoModelPermissionsOrAnonReadOnly,
         (IsOwnerOrReadOnly | IsAdmin | IsModerator)
     )
     http_method_names = ('get', 'post', 'patch', 'delete')
+    read_replica = True
 
 
 class UsernameValidate:
@@ -0,0 +1,44 @@
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class FeedCursorPagination(CursorPagination):
+    ordering = ('pub_date', 'id')
+    page_size_query_param = 'limit'
+
+
+class FeedPagination(LimitOffsetPagination):
+    """Limit/offset pages by default, keyset pages on request.
+
+    Clients opt in with ``?pagination=cursor`` and follow the ``next`` and
+    ``previous`` links afterwards. Cursor pages are ordered by
+    ``(pub_date, id)``, skip the ``COUNT(*)`` query and cost the same at
+    any depth.
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def uses_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.cursor_mode
+            or FeedCursorPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.uses_cursor(request):
+            self.cursor_paginator = FeedCursorPagination()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class LeaderboardPagination(LimitOffsetPagination):
+    max_limit = 100
@@ -13,7 +13,7 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return ((request.method in permissions.SAFE_METHODS)
                 or request.user.is_authenticated
-                and obj.author == request.user)
+                and obj.author_id == request.user.pk)
 
 
 class IsModerator(permissions.BasePermission):
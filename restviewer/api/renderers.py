@@ -0,0 +1,54 @@
+"""JSON encoding through orjson when it is installed and ``JSON_ENCODER``
+is ``'orjson'``, with the standard library encoder as the fallback."""
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SEPARATORS = (',', ':')
+
+
+def orjson_enabled():
+    return orjson is not None and settings.JSON_ENCODER == 'orjson'
+
+
+def dumps(data, encoder):
+    """Return ``data`` as UTF-8 JSON bytes, written as ``encoder`` would.
+
+    ``encoder`` has to be a ``json.JSONEncoder`` with ``SEPARATORS`` and
+    ``ensure_ascii=False``, which is the output orjson produces.
+    """
+    if orjson_enabled():
+        try:
+            return orjson.dumps(data, default=encoder.default,
+                                option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except orjson.JSONEncodeError:
+            pass
+    return encoder.encode(data).encode()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` encoding through ``dumps``.
+
+    Indented output, or settings asking for ASCII or spaced JSON, are
+    left to the parent class.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (data is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type,
+                                   renderer_context or {})):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        encoder = self.encoder_class(
+            ensure_ascii=False,
+            allow_nan=not self.strict,
+            separators=SEPARATORS
+        )
+        # Like the parent class, escape the line separators that
+        # JavaScript does not allow in string literals.
+        return dumps(data, encoder).replace(
+            b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
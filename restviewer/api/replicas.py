@@ -0,0 +1,54 @@
+"""Routing of catalog reads to read replicas.
+
+``ReplicaRoutingMiddleware`` picks a replica for GET requests that list
+or retrieve titles, reviews, comments, categories or genres, and
+``ReadReplicaRouter`` sends the reads of such a request there. Writes,
+reads inside a transaction on the primary and everything outside these
+requests go to ``default``.
+
+Replicas lag behind the primary, so a client that has just written
+would not see its own change. After a successful write, requests with
+the same credentials read from the primary for
+``REPLICA_STICKY_SECONDS``; pins are kept in the default cache, so share
+it between processes.
+"""
+from contextvars import ContextVar
+from hashlib import sha1
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+current_replica = ContextVar('current_replica', default=None)
+
+REPLICA_ACTIONS = ('list', 'retrieve')
+
+
+def pin_key(credentials):
+    return f'replica_pin:{sha1(credentials.encode()).hexdigest()}'
+
+
+def pin(credentials):
+    cache.set(pin_key(credentials), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(credentials):
+    return cache.get(pin_key(credentials), False)
+
+
+class ReadReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replica = current_replica.get()
+        if replica is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return replica
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = (DEFAULT_DB_ALIAS, *settings.READ_REPLICAS)
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
@@ -0,0 +1,129 @@
+"""Read serializer output through field accessors compiled once per
+serializer; ``FAST_SERIALIZERS = False`` switches back to DRF's path."""
+from collections.abc import Mapping
+from datetime import datetime
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# Fields converted by a builtin, as long as the field class keeps the
+# to_representation it inherits.
+CONVERTERS = (
+    (serializers.IntegerField, int),
+    (serializers.FloatField, float),
+    (serializers.CharField, str),
+)
+
+
+def inherits_representation(field, field_class):
+    return (isinstance(field, field_class)
+            and type(field).to_representation is field_class.to_representation)
+
+
+def many_converter(field):
+    convert = converter(field.child)
+
+    def to_list(value):
+        items = value.all() if isinstance(value, models.Manager) else value
+        return [convert(item) for item in items]
+    return to_list
+
+
+def datetime_converter(field):
+    """Return ISO 8601 output of ``DateTimeField`` for aware datetimes,
+    leaving every other value to the field."""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = getattr(field, 'timezone', field.default_timezone())
+    if (type(field).enforce_timezone
+            is not serializers.DateTimeField.enforce_timezone
+            or not isinstance(output_format, str)
+            or output_format.lower() != ISO_8601
+            or field_timezone is None):
+        return field.to_representation
+
+    def to_iso(value):
+        if not isinstance(value, datetime) or not timezone.is_aware(value):
+            return field.to_representation(value)
+        try:
+            text = value.astimezone(field_timezone).isoformat()
+        except OverflowError:
+            return field.to_representation(value)
+        return text[:-6] + 'Z' if text.endswith('+00:00') else text
+    return to_iso
+
+
+def converter(field):
+    """Return a function turning a non-null attribute into output."""
+    if isinstance(field, FastRepresentationMixin) and field.fast_fields:
+        return field.fast_representation
+    if (isinstance(field, serializers.ListSerializer)
+            and inherits_representation(field, serializers.ListSerializer)):
+        return many_converter(field)
+    if inherits_representation(field, serializers.DateTimeField):
+        return datetime_converter(field)
+    if inherits_representation(field, serializers.SlugRelatedField):
+        return attrgetter(field.slug_field)
+    for field_class, convert in CONVERTERS:
+        if inherits_representation(field, field_class):
+            return convert
+    return field.to_representation
+
+
+def prefetched_getter(field):
+    """Read a to-many relation from the prefetch cache when it is there,
+    without creating a related manager per object."""
+    name = field.source
+    get = attrgetter(name)
+
+    def get_items(instance):
+        prefetched = getattr(instance, '_prefetched_objects_cache', {})
+        if name in prefetched:
+            return prefetched[name]
+        return get(instance)
+    return get_items
+
+
+def getter(field):
+    """Return a function reading the attribute of a field."""
+    if (isinstance(field, serializers.ListSerializer)
+            and len(field.source_attrs) == 1
+            and type(field).get_attribute is serializers.Field.get_attribute):
+        return prefetched_getter(field)
+    if (len(field.source_attrs) == 1
+            and type(field).get_attribute in (
+                serializers.Field.get_attribute,
+                serializers.RelatedField.get_attribute)
+            and not (isinstance(field, serializers.RelatedField)
+                     and field.use_pk_only_optimization())):
+        return attrgetter(field.source)
+    return field.get_attribute
+
+
+class FastRepresentationMixin:
+    """Serialize model instances with precompiled field accessors."""
+
+    @cached_property
+    def fast_fields(self):
+        if not settings.FAST_SERIALIZERS:
+            return None
+        return [
+            (field.field_name, getter(field), converter(field))
+            for field in self._readable_fields
+        ]
+
+    def fast_representation(self, instance):
+        data = {}
+        for name, get, convert in self.fast_fields:
+            value = get(instance)
+            data[name] = None if value is None else convert(value)
+        return data
+
+    def to_representation(self, instance):
+        if self.fast_fields is None or isinstance(instance, Mapping):
+            return super().to_representation(instance)
+        return self.fast_representation(instance)
@@ -0,0 +1,190 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.db.models import (
+    CharField,
+    F,
+    FloatField,
+    IntegerField,
+    Q,
+    Value
+)
+
+from reviews.models import Comment, Review, Title
+
+TITLES = 'titles'
+REVIEWS = 'reviews'
+COMMENTS = 'comments'
+KINDS = (TITLES, REVIEWS, COMMENTS)
+RESULT_FIELDS = ('kind', 'id', 'title_id', 'review_id', 'text', 'rank')
+SEARCH_INDEXES = ('title_search', 'review_search', 'comment_search')
+
+FTS_SELECTS = {
+    TITLES: (
+        "SELECT 'titles', title_search.rowid, title_search.rowid, NULL, "
+        "snippet(title_search, -1, '', '', '...', 16), bm25(title_search) "
+        "FROM title_search WHERE title_search MATCH %s"
+    ),
+    REVIEWS: (
+        "SELECT 'reviews', review_search.rowid, r.title_id, r.id, "
+        "snippet(review_search, -1, '', '', '...', 16), "
+        "bm25(review_search) "
+        "FROM review_search "
+        "JOIN reviews_review r ON r.id = review_search.rowid "
+        "WHERE review_search MATCH %s"
+    ),
+    COMMENTS: (
+        "SELECT 'comments', comment_search.rowid, r.title_id, c.review_id, "
+        "snippet(comment_search, -1, '', '', '...', 16), "
+        "bm25(comment_search) "
+        "FROM comment_search "
+        "JOIN reviews_comment c ON c.id = comment_search.rowid "
+        "JOIN reviews_review r ON r.id = c.review_id "
+        "WHERE comment_search MATCH %s"
+    ),
+}
+FTS_COUNTS = {
+    TITLES: 'SELECT count(*) FROM title_search WHERE title_search MATCH %s',
+    REVIEWS: (
+        'SELECT count(*) FROM review_search WHERE review_search MATCH %s'
+    ),
+    COMMENTS: (
+        'SELECT count(*) FROM comment_search WHERE comment_search MATCH %s'
+    ),
+}
+
+
+def match_expression(query):
+    """Turn free text into an FTS5 query matching all word prefixes."""
+    words = query.split()
+    return ' '.join(
+        '"{}"*'.format(word.replace('"', '""')) for word in words)
+
+
+class FullTextSearch:
+    """Ranked search over the SQLite FTS5 indexes of ``api`` migrations.
+
+    Behaves like a sliceable sequence with ``count()``, so the regular
+    paginators can page through it.
+    """
+
+    def __init__(self, query, kinds=KINDS):
+        self.match = match_expression(query)
+        self.kinds = kinds
+
+    def count(self):
+        sql = ' + '.join(f'({FTS_COUNTS[kind]})' for kind in self.kinds)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT {sql}', [self.match] * len(self.kinds))
+            return cursor.fetchone()[0]
+
+    def __getitem__(self, index):
+        sql = ' UNION ALL '.join(FTS_SELECTS[kind] for kind in self.kinds)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{sql} ORDER BY 6, 1, 2 LIMIT %s OFFSET %s',
+                [self.match] * len(self.kinds)
+                + [index.stop - index.start, index.start]
+            )
+            return [dict(zip(RESULT_FIELDS, row)) for row in cursor]
+
+
+class ContainsSearch:
+    """Unranked ``icontains`` search, used where FTS5 is not available."""
+
+    def __init__(self, query, kinds=KINDS):
+        words = query.split()
+        querysets = {
+            TITLES: Title.objects.filter(self.matches(
+                words, 'name', 'description')).annotate(
+                    kind=Value(TITLES, CharField()),
+                    title_ref=F('id'),
+                    review_ref=Value(None, IntegerField()),
+                    snippet=F('name')),
+            REVIEWS: Review.objects.filter(self.matches(
+                words, 'text')).annotate(
+                    kind=Value(REVIEWS, CharField()),
+                    title_ref=F('title_id'),
+                    review_ref=F('id'),
+                    snippet=F('text')),
+            COMMENTS: Comment.objects.filter(self.matches(
+                words, 'text')).annotate(
+                    kind=Value(COMMENTS, CharField()),
+                    title_ref=F('review__title_id'),
+                    review_ref=F('review_id'),
+                    snippet=F('text')),
+        }
+        selected = [
+            querysets[kind].annotate(
+                rank=Value(0.0, FloatField())
+            ).values_list(
+                'kind', 'id', 'title_ref', 'review_ref', 'snippet', 'rank')
+            for kind in kinds
+        ]
+        self.queryset = selected[0].union(*selected[1:], all=True)
+
+    @staticmethod
+    def matches(words, *fields):
+        condition = Q()
+        for word in words:
+            any_field = Q()
+            for field in fields:
+                any_field |= Q(**{f'{field}__icontains': word})
+            condition &= any_field
+        return condition
+
+    def count(self):
+        return self.queryset.count()
+
+    def __getitem__(self, index):
+        return [dict(zip(RESULT_FIELDS, row))
+                for row in self.queryset.order_by('kind', 'id')[index]]
+
+
+_fts_found = False
+
+
+def fts_available():
+    """Whether the FTS5 index exists; only a found index is remembered, so
+    a process that asked before ``migrate`` picks it up afterwards."""
+    global _fts_found
+    if not _fts_found:
+        _fts_found = (
+            connection.vendor == 'sqlite'
+            and 'title_search' in connection.introspection.table_names())
+    return _fts_found
+
+
+@contextmanager
+def search_index_rebuilt():
+    """Leave the search index alone during bulk inserts, then rebuild it.
+
+    The insert triggers index every row on its own; dropping them for the
+    duration of the block and rebuilding the index once is several times
+    faster for large loads.
+    """
+    if not fts_available():
+        yield
+        return
+    names = [f'{index}_insert' for index in SEARCH_INDEXES]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' "
+            f"AND name IN ({', '.join(['%s'] * len(names))})", names)
+        triggers = cursor.fetchall()
+        for name, sql in triggers:
+            cursor.execute(f'DROP TRIGGER {name}')
+        try:
+            yield
+        finally:
+            for name, sql in triggers:
+                cursor.execute(sql)
+            for index in SEARCH_INDEXES:
+                cursor.execute(
+                    f"INSERT INTO {index}({index}) VALUES ('rebuild')")
+
+
+def search(query, kinds=KINDS):
+    if fts_available():
+        return FullTextSearch(query, kinds)
+    return ContainsSearch(query, kinds)
@@ -1,4 +1,3 @@
-from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 
 from reviews.models import (
@@ -6,11 +5,25 @@ from reviews.models import (
     Comment,
     CustomUser,
     Genre,
+    LeaderboardEntry,
     Review,
     Title
 )
+from .bulk import (
+    BulkReviewListSerializer,
+    BulkTitleListSerializer,
+    BulkUpdateItemMixin,
+    CurrentSlugsMixin,
+    PrefetchedSlugRelatedField
+)
 from .mixins import UsernameValidate
-from .variable import LIMIT_NAME_LENGTH, LIMIT_EMAIL_LENGTH
+from .representation import FastRepresentationMixin
+from .search import KINDS
+from .variable import (
+    LIMIT_EMAIL_LENGTH,
+    LIMIT_NAME_LENGTH,
+    LIMIT_SEARCH_LENGTH
+)
 
 
 class UserSerializer(serializers.ModelSerializer, UsernameValidate):
@@ -59,25 +72,27 @@ class GetTokenSerializer(serializers.Serializer, UsernameValidate):
     confirmation_code = serializers.CharField(required=True)
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(FastRepresentationMixin,
+                         serializers.ModelSerializer):
 
     class Meta:
         fields = ('name', 'slug')
         model = Category
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(FastRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         fields = ('name', 'slug')
         model = Genre
 
 
-class TitleCreateUpdateSerializer(serializers.ModelSerializer):
-    category = serializers.SlugRelatedField(
+class TitleCreateUpdateSerializer(CurrentSlugsMixin,
+                                  serializers.ModelSerializer):
+    category = PrefetchedSlugRelatedField(
         queryset=Category.objects.all(),
         slug_field='slug',
     )
-    genre = serializers.SlugRelatedField(
+    genre = PrefetchedSlugRelatedField(
         queryset=Genre.objects.all(),
         slug_field='slug',
         many=True,
@@ -99,9 +114,16 @@ class TitleCreateUpdateSerializer(serializers.ModelSerializer):
             'category',
             'genre'
         )
+        list_serializer_class = BulkTitleListSerializer
+
 
+class TitleBulkUpdateSerializer(BulkUpdateItemMixin,
+                                TitleCreateUpdateSerializer):
+    pass
 
-class TitleReadOnlySerializer(serializers.ModelSerializer):
+
+class TitleReadOnlySerializer(FastRepresentationMixin,
+                              serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(read_only=True, many=True)
     rating = serializers.IntegerField(
@@ -122,8 +144,18 @@ class TitleReadOnlySerializer(serializers.ModelSerializer):
         model = Title
 
 
-class BaseAuthorSerializer(serializers.ModelSerializer):
-    author = serializers.SlugRelatedField(
+class LeaderboardEntrySerializer(FastRepresentationMixin,
+                                 serializers.ModelSerializer):
+    title = TitleReadOnlySerializer(read_only=True)
+
+    class Meta:
+        fields = ('score', 'title')
+        model = LeaderboardEntry
+
+
+class BaseAuthorSerializer(FastRepresentationMixin,
+                           serializers.ModelSerializer):
+    author = PrefetchedSlugRelatedField(
         slug_field='username',
         queryset=CustomUser.objects.all(),
         default=serializers.CurrentUserDefault()
@@ -136,20 +168,41 @@ class ReviewSerializer(BaseAuthorSerializer):
     class Meta:
         model = Review
         exclude = ('title',)
+        list_serializer_class = BulkReviewListSerializer
 
     def validate_author(self, value):
-        if self.context['request'].method == 'POST':
-            request = self.context['request']
-            title_id = request.parser_context['kwargs']['title_id']
-            title = get_object_or_404(Title, pk=title_id)
-            if title.reviews.filter(author__username=value):
+        # Items of a bulk request are checked together by the list.
+        if self.context['request'].method == 'POST' and self.parent is None:
+            title = self.context['view'].title
+            if title.reviews.filter(author=value).exists():
                 raise serializers.ValidationError(
                     'You can only post one review per title.')
         return value
 
 
+class ReviewBulkUpdateSerializer(BulkUpdateItemMixin, ReviewSerializer):
+    author = serializers.SlugRelatedField(
+        slug_field='username',
+        read_only=True
+    )
+
+
 class CommentSerializer(BaseAuthorSerializer):
 
     class Meta:
         model = Comment
         exclude = ('review',)
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=LIMIT_SEARCH_LENGTH)
+    type = serializers.MultipleChoiceField(choices=KINDS, required=False)
+
+
+class SearchResultSerializer(serializers.Serializer):
+    type = serializers.CharField(source='kind')
+    id = serializers.IntegerField()
+    title_id = serializers.IntegerField()
+    review_id = serializers.IntegerField(allow_null=True)
+    text = serializers.CharField()
+    rank = serializers.FloatField()
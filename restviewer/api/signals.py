@@ -0,0 +1,45 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.cache import invalidate
+from api.metrics import watch_queries
+from api.slugs import forget
+from reviews.models import Category, Genre, Review, Title
+
+CACHE_GROUPS = {
+    Category: ('categories', 'titles'),
+    Genre: ('genres', 'titles'),
+    Title: ('titles',),
+    Review: ('titles',),
+}
+
+
+def invalidate_cached_responses(sender, **kwargs):
+    invalidate(*CACHE_GROUPS[sender])
+
+
+# Connected per model: a receiver for every sender would keep deletes of
+# any other model from running as one query.
+for model in CACHE_GROUPS:
+    post_save.connect(invalidate_cached_responses, sender=model)
+    post_delete.connect(invalidate_cached_responses, sender=model)
+
+
+def forget_cached_slugs(sender, **kwargs):
+    forget(sender)
+
+
+for model in (Category, Genre):
+    post_save.connect(forget_cached_slugs, sender=model)
+    post_delete.connect(forget_cached_slugs, sender=model)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, **kwargs):
+    invalidate('titles')
+
+
+@receiver(connection_created)
+def count_sampled_queries(sender, connection, **kwargs):
+    watch_queries(connection)
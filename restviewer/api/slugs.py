@@ -0,0 +1,54 @@
+"""Per-process slug lookups of categories and genres, reloaded when their
+response cache group changes or after ``SLUG_CACHE_TIMEOUT`` seconds."""
+from time import monotonic
+
+from django.conf import settings
+
+from reviews.models import Category, Genre
+
+from api.cache import current_version
+
+# Models kept here, with their response cache groups.
+CACHED_MODELS = {Category: 'categories', Genre: 'genres'}
+
+_objects = {}
+
+
+def get_objects(model):
+    """Return ``{slug: object}`` of all rows of ``model``."""
+    version = current_version(CACHED_MODELS[model])
+    entry = _objects.get(model)
+    if entry is not None and entry[0] == version and entry[1] > monotonic():
+        return entry[2]
+    objects = {obj.slug: obj for obj in model.objects.all()}
+    _objects[model] = (
+        version, monotonic() + settings.SLUG_CACHE_TIMEOUT, objects)
+    return objects
+
+
+def get_object(model, slug):
+    """Return the row of ``model`` with ``slug``, or ``None``.
+
+    Slugs missing from the cache are looked up in the database, since
+    another process may have added them; a hit there reloads the cache.
+    """
+    obj = get_objects(model).get(slug)
+    if obj is None:
+        obj = model.objects.filter(slug=slug).first()
+        if obj is not None:
+            forget(model)
+    return obj
+
+
+def get_id(model, slug):
+    """Return the id of the row of ``model`` with ``slug``, or ``None``."""
+    obj = get_object(model, slug)
+    return None if obj is None else obj.pk
+
+
+def forget(model):
+    _objects.pop(model, None)
+
+
+def forget_all():
+    _objects.clear()
@@ -0,0 +1,998 @@
+import asyncio
+import csv
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+from uuid import UUID
+
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.test import (
+    AsyncClient,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import utc
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.authentication import RoleAccessToken
+from api.bulk import DUPLICATE_ID, DUPLICATE_REVIEW
+from api.filters import TITLE_ORDERINGS
+from api.middleware import (
+    InstrumentationMiddleware,
+    ReplicaRoutingMiddleware
+)
+from api.renderers import FastJSONRenderer
+from api.search import ContainsSearch, FullTextSearch, fts_available
+from api.slugs import get_objects
+from api.throttling import CacheCounterStore
+
+from reviews.models import (
+    Category,
+    Comment,
+    CustomUser,
+    Genre,
+    LeaderboardEntry,
+    QueuedEmail,
+    Review,
+    Title
+)
+
+API_ROOT = '/api/v1/'
+
+
+class APITestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Film', slug='film')
+        cls.genres = [
+            Genre.objects.create(name='Drama', slug='drama'),
+            Genre.objects.create(name='Comedy', slug='comedy'),
+        ]
+        cls.admin = CustomUser.objects.create(
+            username='admin', email='admin@restviewer.test', role='admin')
+        cls.user = CustomUser.objects.create(
+            username='user', email='user@restviewer.test')
+        cls.other_user = CustomUser.objects.create(
+            username='other', email='other@restviewer.test')
+        cls.titles = []
+        for number in range(5):
+            title = Title.objects.create(
+                name=f'Title {number}',
+                year=2000 + number,
+                category=cls.category
+            )
+            title.genre.set(cls.genres)
+            cls.titles.append(title)
+
+    def setUp(self):
+        for backend in caches.all():
+            backend.clear()
+
+    def client_for(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
+
+
+class TitleQueryCountTests(APITestCase):
+
+    def test_list(self):
+        client = self.client_for()
+        # Count, page of titles joined with their categories, and the
+        # prefetched genres.
+        with self.assertNumQueries(3):
+            response = client.get(f'{API_ROOT}titles/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], len(self.titles))
+
+    def test_list_does_not_grow_with_page_size(self):
+        client = self.client_for()
+        with self.assertNumQueries(3):
+            client.get(f'{API_ROOT}titles/', {'limit': 1})
+        with self.assertNumQueries(3):
+            client.get(f'{API_ROOT}titles/', {'limit': 5})
+
+    def test_retrieve(self):
+        client = self.client_for()
+        # Validator lookup, title joined with its category, and genres.
+        with self.assertNumQueries(3):
+            response = client.get(f'{API_ROOT}titles/{self.titles[0].pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['genre'][0]['slug'], 'drama')
+
+
+def response_caches(backend, location=''):
+    return {
+        'default': {'BACKEND': backend, 'LOCATION': location},
+        'throttle': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    }
+
+
+class ConditionalGetTests(APITestCase):
+
+    def test_title_list(self):
+        client = self.client_for()
+        with TemporaryDirectory() as location, override_settings(
+                CACHES=response_caches(
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                    location)):
+            response = client.get(f'{API_ROOT}titles/')
+            self.assertNotIn('Last-Modified', response)
+            with self.assertNumQueries(0):
+                response = client.get(
+                    f'{API_ROOT}titles/', HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304)
+            Review.objects.create(
+                title=self.titles[0], author=self.user, text='Review.',
+                score=9)
+            response = client.get(
+                f'{API_ROOT}titles/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_title_list_with_local_cache(self):
+        # Another process would keep an ETag this one has moved past.
+        response = self.client_for().get(f'{API_ROOT}titles/')
+        self.assertNotIn('ETag', response)
+
+    def test_title_list_without_cache(self):
+        with override_settings(CACHES=response_caches(
+                'django.core.cache.backends.dummy.DummyCache')):
+            response = self.client_for().get(f'{API_ROOT}titles/')
+        self.assertNotIn('ETag', response)
+
+    def test_title_detail_with_invalid_id(self):
+        response = self.client_for().get(f'{API_ROOT}titles/abc/')
+        self.assertEqual(response.status_code, 404)
+
+
+class NestedQueryCountTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.title = self.titles[0]
+        self.review = Review.objects.create(
+            title=self.title, author=self.user, text='Review.', score=5)
+        Review.objects.create(
+            title=self.title, author=self.other_user, text='Other.', score=6)
+        self.comment = Comment.objects.create(
+            review=self.review, author=self.user, text='Comment.')
+        Comment.objects.create(
+            review=self.review, author=self.other_user, text='Other.')
+        self.client = self.client_for(self.user)
+        self.reviews_url = f'{API_ROOT}titles/{self.title.pk}/reviews/'
+        self.review_url = f'{self.reviews_url}{self.review.pk}/'
+        self.comments_url = f'{self.review_url}comments/'
+        self.comment_url = f'{self.comments_url}{self.comment.pk}/'
+
+    def test_review_list(self):
+        # Title, count and page.
+        with self.assertNumQueries(3):
+            response = self.client.get(self.reviews_url)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_review_retrieve(self):
+        # Validator lookup and review.
+        with self.assertNumQueries(2):
+            response = self.client.get(self.review_url)
+        self.assertEqual(response.data['author'], self.user.username)
+
+    def test_review_create(self):
+        self.review.delete()
+        # Title, uniqueness check, and inside a savepoint the insert, the
+        # title's modified time, its rating totals and its leaderboard
+        # scores.
+        with self.assertNumQueries(8):
+            response = self.client.post(
+                self.reviews_url, {'text': 'New.', 'score': 7})
+        self.assertEqual(response.status_code, 201)
+
+    def test_review_create_twice(self):
+        # Title and uniqueness check, without writes.
+        with self.assertNumQueries(2):
+            response = self.client.post(
+                self.reviews_url, {'text': 'New.', 'score': 7})
+        self.assertEqual(response.status_code, 400)
+
+    def test_review_update(self):
+        # Review, and inside a savepoint the update and the same title
+        # updates as a new review.
+        with self.assertNumQueries(7):
+            response = self.client.patch(self.review_url, {'score': 3})
+        self.assertEqual(response.status_code, 200)
+
+    def test_review_delete(self):
+        # Review, its comments, their deletion and one touch of the title
+        # per comment, then the review, the title's rating totals,
+        # leaderboard scores and modified time.
+        with self.assertNumQueries(9):
+            response = self.client.delete(self.review_url)
+        self.assertEqual(response.status_code, 204)
+
+    def test_comment_list(self):
+        # Review, count and page.
+        with self.assertNumQueries(3):
+            response = self.client.get(self.comments_url)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_comment_retrieve(self):
+        # Validator lookup and comment.
+        with self.assertNumQueries(2):
+            response = self.client.get(self.comment_url)
+        self.assertEqual(response.data['author'], self.user.username)
+
+    def test_comment_create(self):
+        # Review, insert and the title's modified time.
+        with self.assertNumQueries(3):
+            response = self.client.post(self.comments_url, {'text': 'New.'})
+        self.assertEqual(response.status_code, 201)
+
+    def test_comment_update(self):
+        with self.assertNumQueries(3):
+            response = self.client.patch(self.comment_url, {'text': 'New.'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_comment_delete(self):
+        with self.assertNumQueries(3):
+            response = self.client.delete(self.comment_url)
+        self.assertEqual(response.status_code, 204)
+
+    def test_comment_of_another_title(self):
+        url = (f'{API_ROOT}titles/{self.titles[1].pk}/reviews/'
+               f'{self.review.pk}/comments/')
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class ClaimsAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        user = CustomUser.objects.create(
+            username='demoted', email='demoted@restviewer.test', role='admin')
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(user)}')
+        # A demotion the cached token version has not caught up with, as
+        # when it was made by a process with another cache.
+        CustomUser.objects.filter(pk=user.pk).update(role='user')
+        self.user = user
+
+    def test_reads_are_answered_from_claims(self):
+        # Count and page, without a user query.
+        with self.assertNumQueries(2):
+            response = self.client.get(f'{API_ROOT}users/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_title_reads_skip_the_user_query(self):
+        # Count, page of titles and their genres.
+        with self.assertNumQueries(3):
+            response = self.client.get(f'{API_ROOT}titles/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_review_reads_skip_the_user_query(self):
+        Review.objects.create(
+            title=self.titles[0], author=self.other_user, text='Review.',
+            score=5)
+        # Title, count and page.
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                f'{API_ROOT}titles/{self.titles[0].pk}/reviews/')
+        self.assertEqual(response.data['count'], 1)
+
+    def test_writes_load_the_user(self):
+        response = self.client.post(
+            f'{API_ROOT}categories/', {'name': 'Books', 'slug': 'books'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_me_keeps_the_stored_role(self):
+        response = self.client.patch(
+            f'{API_ROOT}users/me/', {'bio': 'Bio.', 'role': 'admin'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['role'], 'user')
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.role, self.user.bio), ('user', 'Bio.'))
+
+
+class ResponseCacheTests(APITestCase):
+
+    def test_responses_are_cached(self):
+        client = self.client_for()
+        url = f'{API_ROOT}titles/{self.titles[0].pk}/'
+        client.get(url)
+        # Only the validator lookup.
+        with self.assertNumQueries(1):
+            self.assertEqual(client.get(url).status_code, 200)
+
+    def test_unknown_parameters_share_an_entry(self):
+        client = self.client_for()
+        client.get(f'{API_ROOT}categories/')
+        with self.assertNumQueries(0):
+            response = client.get(f'{API_ROOT}categories/', {'page': 2})
+        self.assertEqual(response.data['count'], 1)
+
+    def test_known_parameters_get_their_own_entries(self):
+        client = self.client_for()
+        client.get(f'{API_ROOT}categories/')
+        for params in ({'search': 'Books'}, {'limit': 1}, {'offset': 1}):
+            with CaptureQueriesContext(connection) as queries:
+                client.get(f'{API_ROOT}categories/', params)
+            self.assertTrue(queries, params)
+        client.get(f'{API_ROOT}titles/', {'year': 2000})
+        response = client.get(f'{API_ROOT}titles/', {'year__gte': 2001})
+        self.assertEqual(response.data['count'], len(self.titles) - 1)
+
+    @override_settings(ALLOWED_HOSTS=['a.example', 'b.example'])
+    def test_links_follow_the_host(self):
+        client = self.client_for()
+        url = f'{API_ROOT}titles/'
+        client.get(url, {'limit': 2}, HTTP_HOST='a.example')
+        response = client.get(
+            url, {'limit': 2}, HTTP_HOST='b.example', secure=True)
+        self.assertTrue(
+            response.data['next'].startswith('https://b.example/'))
+
+    @override_settings(READ_REPLICAS=['default'])
+    def test_replica_responses_are_not_cached(self):
+        client = self.client_for()
+        url = f'{API_ROOT}titles/{self.titles[0].pk}/'
+        client.get(url)
+        with self.assertNumQueries(3):
+            self.assertEqual(client.get(url).status_code, 200)
+
+
+class ThrottleTests(APITestCase):
+
+    def test_signup_is_limited_per_username(self):
+        client = self.client_for()
+        data = {'username': 'throttled', 'email': 'invalid'}
+        for _ in range(5):
+            response = client.post(f'{API_ROOT}auth/signup/', data)
+            self.assertEqual(response.status_code, 400)
+        response = client.post(f'{API_ROOT}auth/signup/', data)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_counters_outlive_response_cache_entries(self):
+        client = self.client_for()
+        data = {'username': 'throttled', 'email': 'invalid'}
+        for _ in range(5):
+            client.post(f'{API_ROOT}auth/signup/', data)
+        cache.clear()
+        response = client.post(f'{API_ROOT}auth/signup/', data)
+        self.assertEqual(response.status_code, 429)
+
+    def test_cache_without_atomic_incr_is_rejected(self):
+        caches = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'throttle': {
+                'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                'LOCATION': 'throttle'},
+        }
+        with override_settings(CACHES=caches):
+            with self.assertRaises(ImproperlyConfigured):
+                CacheCounterStore().cache
+
+
+class SlugCacheTests(APITestCase):
+
+    def test_filter_finds_slug_changed_elsewhere(self):
+        client = self.client_for()
+        client.get(f'{API_ROOT}titles/', {'category': 'film'})
+        # An update without signals, as made by another process.
+        Category.objects.filter(pk=self.category.pk).update(slug='movies')
+        response = client.get(f'{API_ROOT}titles/', {'category': 'movies'})
+        self.assertEqual(response.data['count'], len(self.titles))
+
+    def test_write_finds_slug_added_elsewhere(self):
+        get_objects(Genre)
+        Genre.objects.filter(pk=self.genres[1].pk).update(slug='satire')
+        response = self.client_for(self.admin).post(
+            f'{API_ROOT}titles/',
+            {'name': 'New', 'year': 2020, 'category': 'film',
+             'genre': ['satire']}
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_unknown_slug_is_rejected(self):
+        response = self.client_for(self.admin).post(
+            f'{API_ROOT}titles/',
+            {'name': 'New', 'year': 2020, 'category': 'film',
+             'genre': ['unknown']}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('genre', response.data)
+
+
+class DeletedSlugTests(TransactionTestCase):
+
+    def setUp(self):
+        for backend in caches.all():
+            backend.clear()
+        Category.objects.create(name='Film', slug='film')
+        self.genre = Genre.objects.create(name='Drama', slug='drama')
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create(
+            username='admin', email='admin@restviewer.test', role='admin'))
+        get_objects(Genre)
+        # A deletion without signals, as made by another process.
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM reviews_genre '
+                           'WHERE nameslugmodel_ptr_id = %s', [self.genre.pk])
+            cursor.execute('DELETE FROM reviews_nameslugmodel '
+                           'WHERE id = %s', [self.genre.pk])
+
+    def test_create(self):
+        response = self.client.post(
+            f'{API_ROOT}titles/',
+            {'name': 'New', 'year': 2020, 'category': 'film',
+             'genre': ['drama']}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('genre', response.data)
+        self.assertFalse(Title.objects.exists())
+
+    def test_bulk_create(self):
+        response = self.client.post(
+            f'{API_ROOT}titles/bulk/',
+            [{'name': 'New', 'year': 2020, 'category': 'film',
+              'genre': ['drama']}],
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('genre', response.data[0])
+        self.assertFalse(Title.objects.exists())
+
+
+class QueryPlanTests(APITestCase):
+
+    def test_api_queries_use_indexes(self):
+        review = Review.objects.create(
+            title=self.titles[0], author=self.user, text='Review.', score=5)
+        Comment.objects.create(
+            review=review, author=self.user, text='Comment.')
+        call_command('explain_api_queries', check=True, stdout=StringIO())
+
+
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=1, READ_REPLICAS=['default'])
+class AsyncMiddlewareTests(TransactionTestCase):
+
+    def setUp(self):
+        for backend in caches.all():
+            backend.clear()
+        title = Title.objects.create(
+            name='Title', year=2000,
+            category=Category.objects.create(name='Film', slug='film'))
+        title.genre.add(Genre.objects.create(name='Drama', slug='drama'))
+
+    def test_chain_stays_async(self):
+        async def get_response(request):
+            pass
+
+        for middleware in (InstrumentationMiddleware,
+                           ReplicaRoutingMiddleware):
+            self.assertTrue(
+                asyncio.iscoroutinefunction(middleware(get_response)))
+
+    async def test_queries_are_timed_in_any_thread(self):
+        client = AsyncClient()
+        for url in (f'{API_ROOT}async/titles/', f'{API_ROOT}titles/'):
+            response = await client.get(url)
+            self.assertEqual(response.status_code, 200)
+            # Count, page of titles and their genres.
+            self.assertIn('desc="3 queries"', response['Server-Timing'])
+
+
+class FastSerializerTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.review = Review.objects.create(
+            title=self.titles[0], author=self.user, text='Review.', score=7)
+        Review.objects.create(
+            title=self.titles[1], author=self.other_user, text='Other.',
+            score=4)
+        Comment.objects.create(
+            review=self.review, author=self.other_user, text='Comment.')
+
+    def test_both_paths_render_the_same_bytes(self):
+        review_url = (f'{API_ROOT}titles/{self.titles[0].pk}/reviews/'
+                      f'{self.review.pk}/')
+        urls = (
+            f'{API_ROOT}titles/',
+            f'{API_ROOT}titles/{self.titles[0].pk}/',
+            f'{API_ROOT}titles/{self.titles[0].pk}/reviews/',
+            review_url,
+            f'{review_url}comments/',
+            f'{API_ROOT}categories/',
+            f'{API_ROOT}genres/',
+            f'{API_ROOT}leaderboards/',
+            f'{API_ROOT}leaderboards/genre/drama/',
+            f'{API_ROOT}leaderboards/year/2000/',
+        )
+        client = self.client_for()
+        for url in urls:
+            rendered = []
+            for fast in (True, False):
+                cache.clear()
+                with override_settings(FAST_SERIALIZERS=fast):
+                    response = client.get(url)
+                self.assertEqual(response.status_code, 200, url)
+                rendered.append(response.content)
+            self.assertEqual(rendered[0], rendered[1], url)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    data = {
+        'datetime': datetime(2020, 1, 2, 3, 4, 5, 678901, tzinfo=utc),
+        'naive': datetime(2020, 1, 2, 3, 4, 5),
+        'date': date(2020, 1, 2),
+        'time': time(3, 4, 5, 600000),
+        'timedelta': timedelta(days=1, seconds=5),
+        'decimal': Decimal('1.10'),
+        'uuid': UUID('12345678-1234-5678-1234-567812345678'),
+        'big': 2 ** 70,
+        'negative': -2 ** 64,
+        'separators': 'a\u2028b\u2029c',
+        'text': 'Ünïcode "quotes" \\ \n',
+        'float': 0.1,
+        'keys': {1: 'int', None: 'null'},
+        'set': {1},
+        'nested': [[], {}, None, True],
+    }
+
+    def assert_renders_like_drf(self, data):
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_values(self):
+        for name, value in self.data.items():
+            self.assert_renders_like_drf({name: value})
+        self.assert_renders_like_drf(self.data)
+
+    @override_settings(JSON_ENCODER='json')
+    def test_standard_library_encoder(self):
+        self.assert_renders_like_drf(self.data)
+
+
+class BulkWriteTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.admin)
+        self.titles_url = f'{API_ROOT}titles/bulk/'
+        self.reviews_url = (f'{API_ROOT}titles/{self.titles[0].pk}/'
+                            f'reviews/bulk/')
+
+    def new_title(self, name, **fields):
+        return {'name': name, 'year': 2020, 'category': 'film',
+                'genre': ['drama'], **fields}
+
+    def test_title_create(self):
+        response = self.client.post(
+            self.titles_url,
+            [self.new_title('New'), self.new_title('Other', genre=[])],
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [item['name'] for item in response.data], ['New', 'Other'])
+        title = Title.objects.get(pk=response.data[0]['id'])
+        self.assertEqual(
+            [genre.slug for genre in title.genre.all()], ['drama'])
+        self.assertTrue(LeaderboardEntry.objects.filter(
+            title=title, scope=LeaderboardEntry.GENRE).exists())
+
+    def test_title_partial_update(self):
+        response = self.client.patch(
+            self.titles_url,
+            [{'id': self.titles[0].pk, 'name': 'Renamed'},
+             {'id': str(self.titles[1].pk), 'genre': ['comedy']}],
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            Title.objects.get(pk=self.titles[0].pk).name, 'Renamed')
+        self.assertEqual(
+            [genre.slug for genre in self.titles[1].genre.all()], ['comedy'])
+
+    def test_errors_are_reported_per_item(self):
+        response = self.client.post(
+            self.titles_url,
+            [self.new_title('New'), self.new_title('Bad', category='none')],
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('category', response.data[1])
+        self.assertFalse(Title.objects.filter(name='New').exists())
+
+    def test_duplicate_ids(self):
+        pk = self.titles[0].pk
+        response = self.client.patch(
+            self.titles_url,
+            [{'id': pk, 'name': 'A'}, {'id': str(pk), 'name': 'B'},
+             {'id': 0, 'name': 'C'}],
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(response.data[1], {'id': [DUPLICATE_ID]})
+        self.assertEqual(response.data[2], {'id': ['Not found.']})
+
+    def test_users_cannot_write(self):
+        response = self.client_for(self.user).post(
+            self.titles_url, [self.new_title('New')], format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_review_writes_update_ratings(self):
+        response = self.client.post(
+            self.reviews_url,
+            [{'author': 'user', 'text': 'Review.', 'score': 4},
+             {'author': 'other', 'text': 'Review.', 'score': 8}],
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Title.objects.get(pk=self.titles[0].pk).rating, 6)
+        response = self.client.patch(
+            self.reviews_url,
+            [{'id': str(response.data[0]['id']), 'score': 10}],
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        fields = ('review_count', 'score_sum', 'rating')
+        stored = Title.objects.filter(
+            pk=self.titles[0].pk).values_list(*fields).get()
+        self.assertEqual(stored, (2, 18, 9))
+        Title.objects.rebuild_ratings()
+        self.assertEqual(stored, Title.objects.filter(
+            pk=self.titles[0].pk).values_list(*fields).get())
+
+    def test_duplicate_reviews(self):
+        Review.objects.create(
+            title=self.titles[0], author=self.user, text='Review.', score=5)
+        response = self.client.post(
+            self.reviews_url,
+            [{'author': 'user', 'text': 'Again.', 'score': 4},
+             {'author': 'other', 'text': 'Review.', 'score': 8},
+             {'author': 'other', 'text': 'Again.', 'score': 8}],
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {'author': [DUPLICATE_REVIEW]})
+        self.assertEqual(response.data[1], {})
+        self.assertEqual(response.data[2], {'author': [DUPLICATE_REVIEW]})
+
+
+class SearchTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = f'{API_ROOT}search/'
+        self.client = self.client_for()
+        self.reviews = [
+            Review.objects.create(
+                title=self.titles[0], author=self.user, score=5,
+                text='Spaceships, spaceships and more spaceships.'),
+            Review.objects.create(
+                title=self.titles[1], author=self.user, score=5,
+                text='A long story with one spaceship among many other '
+                     'things that happen to its crew on the way home.'),
+        ]
+        self.comment = Comment.objects.create(
+            review=self.reviews[1], author=self.other_user,
+            text='The spaceship was my favourite part.')
+
+    def found(self, query, **params):
+        response = self.client.get(self.url, {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(item['type'], item['id']) for item in response.data[
+            'results']]
+
+    def test_ranked_results(self):
+        response = self.client.get(self.url, {'q': 'spaceship'})
+        ranks = [item['rank'] for item in response.data['results']]
+        self.assertEqual(ranks, sorted(ranks))
+        self.assertEqual(response.data['results'][0]['id'],
+                         self.reviews[0].pk)
+        self.assertEqual(response.data['count'], 3)
+
+    def test_words_are_all_matched_as_prefixes(self):
+        self.assertEqual(self.found('space crew'),
+                         [('reviews', self.reviews[1].pk)])
+        self.assertEqual(
+            self.found('title 3'), [('titles', self.titles[3].pk)])
+
+    def test_pagination(self):
+        everything = self.found('spaceship')
+        response = self.client.get(
+            self.url, {'q': 'spaceship', 'limit': 1, 'offset': 1})
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(
+            [(item['type'], item['id'])
+             for item in response.data['results']], everything[1:2])
+        self.assertIsNotNone(response.data['next'])
+
+    def test_type_filter(self):
+        self.assertEqual(
+            self.found('spaceship', type='comments'),
+            [('comments', self.comment.pk)])
+        self.assertEqual(
+            {kind for kind, pk in self.found(
+                'spaceship', type=['reviews', 'comments'])},
+            {'reviews', 'comments'})
+        response = self.client.get(self.url, {'q': 'a', 'type': 'users'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_index_follows_updates_and_deletes(self):
+        review = self.reviews[0]
+        review.text = 'Submarines.'
+        review.save()
+        self.assertEqual(self.found('submarine'), [('reviews', review.pk)])
+        self.assertNotIn(('reviews', review.pk), self.found('spaceship'))
+        self.comment.delete()
+        self.assertEqual(self.found('favourite'), [])
+        Title.objects.filter(pk=self.titles[2].pk).update(name='Renamed')
+        self.assertEqual(self.found('renamed'),
+                         [('titles', self.titles[2].pk)])
+
+    def test_contains_fallback(self):
+        for query in ('spaceship', 'SPACE crew', 'title'):
+            found = FullTextSearch(query)
+            contained = ContainsSearch(query)
+            self.assertEqual(contained.count(), found.count(), query)
+            self.assertEqual(
+                sorted((item['kind'], item['id'])
+                       for item in contained[0:contained.count()]),
+                sorted((item['kind'], item['id'])
+                       for item in found[0:found.count()]),
+                query
+            )
+
+    def test_missing_index_is_not_remembered(self):
+        with mock.patch('api.search._fts_found', False), mock.patch.object(
+                connection.introspection, 'table_names', return_value=[]):
+            self.assertFalse(fts_available())
+        with mock.patch('api.search._fts_found', False):
+            self.assertTrue(fts_available())
+
+
+class FeedPaginationTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        review = Review.objects.create(
+            title=self.titles[0], author=self.user, text='Review.', score=5)
+        self.comments = [
+            Comment.objects.create(
+                review=review, author=self.other_user, text=f'Comment {n}.')
+            for n in range(5)
+        ]
+        self.url = (f'{API_ROOT}titles/{self.titles[0].pk}/reviews/'
+                    f'{review.pk}/comments/')
+        self.client = self.client_for()
+
+    def test_limit_offset_is_the_default(self):
+        response = self.client.get(self.url, {'limit': 2, 'offset': 2})
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            [comment.pk for comment in self.comments[2:4]])
+        self.assertIn('offset=4', response.data['next'])
+
+    def test_cursor_pages(self):
+        response = self.client.get(
+            self.url, {'pagination': 'cursor', 'limit': 2})
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+        pages = []
+        while True:
+            pages.append([item['id'] for item in response.data['results']])
+            if response.data['next'] is None:
+                break
+            response = self.client.get(response.data['next'])
+        ids = [comment.pk for comment in self.comments]
+        self.assertEqual(pages, [ids[0:2], ids[2:4], ids[4:]])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(
+            [item['id'] for item in response.data['results']], ids[2:4])
+
+    def test_cursor_pages_skip_the_count(self):
+        # Review with its title, and the page.
+        with self.assertNumQueries(2):
+            self.client.get(self.url, {'pagination': 'cursor'})
+
+
+class ExportTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        review = Review.objects.create(
+            title=self.titles[0], author=self.user, text='Ünïcode, "quoted".',
+            score=8)
+        Comment.objects.create(
+            review=review, author=self.other_user, text='Comment.')
+        self.client = self.client_for(self.admin)
+
+    def test_admins_only(self):
+        url = f'{API_ROOT}export/titles.ndjson'
+        self.assertEqual(self.client_for().get(url).status_code, 401)
+        self.assertEqual(
+            self.client_for(self.user).get(url).status_code, 403)
+
+    def test_unknown_export(self):
+        for name in ('users.ndjson', 'titles.xml'):
+            response = self.client.get(f'{API_ROOT}export/{name}')
+            self.assertEqual(response.status_code, 404, name)
+
+    def test_ndjson(self):
+        response = self.client.get(f'{API_ROOT}export/titles.ndjson')
+        self.assertEqual(
+            response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'],
+                         'attachment; filename="titles.ndjson"')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(len(records), len(self.titles))
+        self.assertEqual(records[0], {
+            'id': self.titles[0].pk, 'name': 'Title 0', 'year': 2000,
+            'description': None, 'category': 'film',
+            'genre': ['comedy', 'drama'], 'rating': 8.0, 'review_count': 1,
+        })
+
+    def test_csv(self):
+        response = self.client.get(f'{API_ROOT}export/reviews.csv')
+        self.assertEqual(
+            response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'],
+                         'attachment; filename="reviews.csv"')
+        rows = list(csv.reader(StringIO(
+            b''.join(response.streaming_content).decode())))
+        self.assertEqual(
+            rows[0], ['id', 'title_id', 'author', 'score', 'text', 'pub_date'])
+        self.assertEqual(rows[1][:5], [
+            str(Review.objects.get().pk), str(self.titles[0].pk), 'user', '8',
+            'Ünïcode, "quoted".'])
+        self.assertEqual(len(rows), 2)
+
+
+class SampleRoundTripTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        review = Review.objects.create(
+            title=self.titles[0], author=self.user, text='Review, "quoted".',
+            score=8)
+        Review.objects.create(
+            title=self.titles[0], author=self.other_user, text='Other.',
+            score=3)
+        Comment.objects.create(
+            review=review, author=self.other_user, text='Comment.')
+        self.titles[1].genre.clear()
+        Title.objects.filter(pk=self.titles[2].pk).update(
+            category=None, description='Line\nbreak.')
+        # The files keep milliseconds of publication dates.
+        pub_date = datetime(2020, 1, 2, 3, 4, 5, 678000, tzinfo=utc)
+        Review.objects.update(pub_date=pub_date)
+        Comment.objects.update(pub_date=pub_date)
+
+    @staticmethod
+    def snapshot():
+        # Categories and genres are numbered anew on import, so they are
+        # compared by slug.
+        return {
+            'users': list(CustomUser.objects.order_by('pk').values_list(
+                'pk', 'username', 'email', 'role', 'bio')),
+            'categories': sorted(
+                Category.objects.values_list('name', 'slug')),
+            'genres': sorted(Genre.objects.values_list('name', 'slug')),
+            'titles': [
+                (title.pk, title.name, title.year, title.description,
+                 title.category and title.category.slug,
+                 sorted(genre.slug for genre in title.genre.all()),
+                 title.review_count, title.score_sum, title.rating)
+                for title in Title.objects.order_by('pk').select_related(
+                    'category').prefetch_related('genre')
+            ],
+            'reviews': list(Review.objects.order_by('pk').values_list(
+                'pk', 'title_id', 'author_id', 'score', 'text', 'pub_date')),
+            'comments': list(Comment.objects.order_by('pk').values_list(
+                'pk', 'review_id', 'author_id', 'text', 'pub_date')),
+        }
+
+    def test_export_then_import(self):
+        before = self.snapshot()
+        with TemporaryDirectory() as directory:
+            directory = Path(directory)
+            call_command('export_db', directory, stdout=StringIO())
+            call_command('import_sample_db', directory=directory,
+                         truncate=True, stdout=StringIO())
+        self.assertEqual(self.snapshot(), before)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class SignUpTests(APITestCase):
+
+    def test_signup_queues_the_code(self):
+        response = self.client_for().post(
+            f'{API_ROOT}auth/signup/',
+            {'username': 'new', 'email': 'new@restviewer.test'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mail.outbox, [])
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.recipient, 'new@restviewer.test')
+        call_command('send_queued_email', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['new@restviewer.test'])
+        self.assertIn(CustomUser.objects.get(username='new').confirmation_code,
+                      mail.outbox[0].body)
+
+
+class TitleFilterTests(APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        for title, author, score in (
+                (self.titles[3], self.user, 9),
+                (self.titles[3], self.other_user, 4),
+                (self.titles[1], self.user, 3),
+                (self.titles[4], self.user, 10)):
+            Review.objects.create(
+                title=title, author=author, text='Review.', score=score)
+        Title.objects.filter(pk=self.titles[2].pk).update(name='A title')
+        self.client = self.client_for()
+
+    def found(self, **params):
+        response = self.client.get(
+            f'{API_ROOT}titles/', {'limit': 100, **params})
+        self.assertEqual(response.status_code, 200, params)
+        return [item['id'] for item in response.data['results']]
+
+    def test_ordering(self):
+        for field in TITLE_ORDERINGS:
+            values = Title.objects.values_list(field, 'pk')
+            # SQLite puts NULLs first, and ties go by id.
+            ascending = [pk for value, pk in sorted(
+                values, key=lambda row: (row[0] is not None, row[0], row[1]))]
+            self.assertEqual(self.found(ordering=field), ascending, field)
+            self.assertEqual(
+                self.found(ordering=f'-{field}'), ascending[::-1], field)
+
+    def test_invalid_ordering(self):
+        for value in ('pk', 'year,name', '--year'):
+            response = self.client.get(
+                f'{API_ROOT}titles/', {'ordering': value})
+            self.assertEqual(response.status_code, 400, value)
+            self.assertIn('ordering', response.data)
+
+    def test_year_lte(self):
+        self.assertEqual(
+            sorted(self.found(year__lte=2001)),
+            [self.titles[0].pk, self.titles[1].pk])
+
+    def test_rating_gte(self):
+        # Ratings 6.5, 3 and 10; unrated titles never match.
+        self.assertEqual(
+            sorted(self.found(rating__gte=6.5)),
+            [self.titles[3].pk, self.titles[4].pk])
+        self.assertEqual(len(self.found(rating__gte=0)), 3)
+
+    def test_filters_combine_with_ordering(self):
+        self.assertEqual(
+            self.found(year__gte=2001, rating__gte=1, ordering='-rating'),
+            [self.titles[4].pk, self.titles[3].pk, self.titles[1].pk])
@@ -0,0 +1,179 @@
+"""Rate limits of the signup and token endpoints.
+
+Limits use a sliding window counter: requests are counted in fixed
+windows, and the rate over the last window length is estimated from the
+current count plus the part of the previous count that still falls into
+it. A request therefore costs one read and one atomic increment in the
+counter store, whatever the limit.
+
+The store is set by ``THROTTLE_STORE``. ``LocalCounterStore`` keeps
+counters in the process, and ``CacheCounterStore`` keeps them in the
+``THROTTLE_CACHE_ALIAS`` cache, so limits hold across worker processes
+when that cache is shared. Limits are multiplied by
+``THROTTLE_RATE_MULTIPLIER``, which benchmarks raise.
+"""
+from hashlib import sha1
+from threading import Lock
+from time import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+KEY_PREFIX = 'throttle'
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class LocalCounterStore:
+    """Counters kept by this process only."""
+
+    MAX_KEYS = 100000
+
+    def __init__(self):
+        self.counters = {}
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            count, expires = self.counters.get(key, (0, 0))
+        return count if expires > time() else 0
+
+    def incr(self, key, timeout):
+        now = time()
+        with self.lock:
+            count, expires = self.counters.get(key, (0, 0))
+            if expires <= now:
+                count, expires = 0, now + timeout
+            self.counters[key] = (count + 1, expires)
+            if len(self.counters) > self.MAX_KEYS:
+                self.purge(now)
+        return count + 1
+
+    def purge(self, now):
+        self.counters = {
+            key: value for key, value in self.counters.items()
+            if value[1] > now
+        }
+
+
+def has_atomic_incr(cache):
+    """Whether ``incr`` of a cache backend is atomic and keeps the expiry
+    of the key; the generic one reads, then sets with the default
+    timeout."""
+    return (type(cache).incr is not BaseCache.incr
+            and not isinstance(cache, DummyCache))
+
+
+class CacheCounterStore:
+    """Counters kept in a Django cache with an atomic ``incr``, such as
+    the local memory and memcached backends."""
+
+    @property
+    def cache(self):
+        cache = caches[settings.THROTTLE_CACHE_ALIAS]
+        if not has_atomic_incr(cache):
+            raise ImproperlyConfigured(
+                f'The {settings.THROTTLE_CACHE_ALIAS!r} cache cannot keep '
+                f'throttle counters: {type(cache).__name__} has no atomic '
+                f'incr.')
+        return cache
+
+    def get(self, key):
+        return self.cache.get(key, 0)
+
+    def incr(self, key, timeout):
+        cache = self.cache
+        try:
+            return cache.incr(key)
+        except ValueError:
+            if cache.add(key, 1, timeout):
+                return 1
+            return cache.incr(key)
+
+
+_stores = {}
+_stores_lock = Lock()
+
+
+def get_store():
+    path = settings.THROTTLE_STORE
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = import_string(path)()
+        return _stores[path]
+
+
+def parse_rate(rate):
+    """Return ``(requests, seconds)`` of a rate such as ``'10/min'``."""
+    requests, period = rate.split('/')
+    return int(requests), DURATIONS[period[0]]
+
+
+def wait_time(limit, duration, offset, previous, current):
+    """Seconds until the estimated rate is back within the limit."""
+    if current <= limit:
+        return max(
+            0, duration * (1 - (limit - current) / previous) - offset)
+    return duration - offset + duration * (1 - limit / current)
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Limit requests per key with the rate named
+    ``<view.throttle_scope>_<kind>`` in ``DEFAULT_THROTTLE_RATES``."""
+
+    kind = None
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_key(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        scope = f'{view.throttle_scope}_{self.kind}'
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        ident = self.get_key(request) if rate else None
+        if ident is None:
+            return True
+        limit, duration = parse_rate(rate)
+        limit *= settings.THROTTLE_RATE_MULTIPLIER
+        window, offset = divmod(time(), duration)
+        key = (f'{KEY_PREFIX}:{scope}:'
+               f'{sha1(ident.encode()).hexdigest()}:')
+        store = get_store()
+        previous = store.get(f'{key}{int(window) - 1}')
+        current = store.incr(f'{key}{int(window)}', duration * 2)
+        weight = 1 - offset / duration
+        if previous * weight + current <= limit:
+            return True
+        self.wait_seconds = wait_time(limit, duration, offset, previous,
+                                      current)
+        return False
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPThrottle(SlidingWindowThrottle):
+    kind = 'ip'
+
+    def get_key(self, request):
+        return self.get_ident(request)
+
+
+class UsernameThrottle(SlidingWindowThrottle):
+    """Limit requests naming the same ``username``, from any address."""
+
+    kind = 'username'
+
+    def get_key(self, request):
+        data = request.data
+        username = data.get('username') if hasattr(data, 'get') else None
+        if not isinstance(username, str) or not username.strip():
+            return None
+        return username.strip().lower()
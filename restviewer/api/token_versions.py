@@ -0,0 +1,35 @@
+"""Per-user token versions backing the role claims of access tokens.
+
+A user's version is bumped whenever a claim copied into tokens changes,
+which makes every token issued before the change fall back to loading
+the user from the database. Versions are mirrored into the default
+cache for TOKEN_VERSION_TIMEOUT seconds, which bounds how long a worker
+not sharing that cache can miss a bump made by another one.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+
+def version_key(user_id):
+    return f'token_version:{user_id}'
+
+
+def get_token_version(user_id):
+    version = cache.get(version_key(user_id))
+    if version is None:
+        version = get_user_model().objects.filter(pk=user_id).values_list(
+            'token_version', flat=True).first()
+        if version is not None:
+            cache.set(version_key(user_id), version,
+                      settings.TOKEN_VERSION_TIMEOUT)
+    return version
+
+
+def set_token_version(user_id, version):
+    cache.set(version_key(user_id), version,
+              settings.TOKEN_VERSION_TIMEOUT)
+
+
+def forget_token_version(user_id):
+    cache.delete(version_key(user_id))
@@ -2,12 +2,18 @@ from django.urls import include, path
 
 from rest_framework.routers import DefaultRouter
 
+from api import async_views
 from api.views import (
+    CacheStatsView,
     CategoryViewSet,
     CommentViewSet,
+    ExportView,
     GenreViewSet,
     GetTokenView,
+    LeaderboardView,
+    MetricsView,
     ReviewViewSet,
+    SearchView,
     SignUpView,
     TitleViewSet,
     UserViewSet
@@ -31,8 +37,27 @@ router_v1.register(
     basename='comments'
 )
 
+async_v1 = [
+    path('titles/', async_views.title_list, name='async_titles'),
+    path('titles/<int:title_id>/', async_views.title_detail,
+         name='async_title'),
+    path('titles/<int:title_id>/reviews/', async_views.review_list,
+         name='async_reviews'),
+    path('categories/', async_views.category_list, name='async_categories'),
+    path('genres/', async_views.genre_list, name='async_genres'),
+]
+
 urlpatterns = [
     path('v1/', include(router_v1.urls)),
+    path('v1/async/', include(async_v1)),
     path('v1/auth/signup/', SignUpView.as_view(), name='signup'),
     path('v1/auth/token/', GetTokenView.as_view(), name='get_token'),
+    path('v1/search/', SearchView.as_view(), name='search'),
+    path('v1/leaderboards/', LeaderboardView.as_view(), name='leaderboard'),
+    path('v1/leaderboards/<str:scope>/<str:key>/',
+         LeaderboardView.as_view(), name='scoped_leaderboard'),
+    path('v1/cache/stats/', CacheStatsView.as_view(), name='cache_stats'),
+    path('v1/metrics/', MetricsView.as_view(), name='metrics'),
+    path('v1/export/<str:kind>.<str:export_format>', ExportView.as_view(),
+         name='export'),
 ]
@@ -1,2 +1,4 @@
 LIMIT_NAME_LENGTH = 150
 LIMIT_EMAIL_LENGTH = 254
+LIMIT_SEARCH_LENGTH = 200
+LIMIT_BULK_ITEMS = 5000
@@ -1,10 +1,11 @@
 from django.conf import settings
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 
 from rest_framework import (
     filters,
+    generics,
     mixins,
     permissions,
     status,
@@ -13,30 +14,56 @@ from rest_framework import (
 )
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
 
-from reviews.models import Category, CustomUser, Genre, Title
+from reviews.models import (
+    Category,
+    Comment,
+    CustomUser,
+    Genre,
+    LeaderboardEntry,
+    QueuedEmail,
+    Review,
+    Title
+)
 
+from api.authentication import RoleAccessToken
+from api.cache import get_stats, shared_version
+from api.export import EXPORTS, FORMATS, export
+from api.metrics import export as export_metrics
 from api.filters import TitleFilterSet
+from api.pagination import FeedPagination, LeaderboardPagination
 from api.mixins import (
     AdminPermissionViewSet,
-    OwnerPermissionViewSet
+    BulkWriteMixin,
+    CachedResponseMixin,
+    CachedRetrieveMixin,
+    ConditionalGetMixin,
+    OwnerPermissionViewSet,
+    TimedSerializerMixin
 )
 from api.permissions import IsAdmin
+from api.search import KINDS, search
+from api.throttling import IPThrottle, UsernameThrottle
+from api.slugs import get_id
 from api.serializers import (
     CategorySerializer,
     CommentSerializer,
     GenreSerializer,
     GetTokenSerializer,
+    LeaderboardEntrySerializer,
+    ReviewBulkUpdateSerializer,
     ReviewSerializer,
+    SearchQuerySerializer,
+    SearchResultSerializer,
     SignUpSerializer,
+    TitleBulkUpdateSerializer,
     TitleCreateUpdateSerializer,
     TitleReadOnlySerializer,
     UserSerializer
 )
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(TimedSerializerMixin, viewsets.ModelViewSet):
     queryset = CustomUser.objects.all()
     serializer_class = UserSerializer
     http_method_names = ('get', 'post', 'patch', 'delete')
@@ -54,35 +81,41 @@ class UserViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(request.user)
             return Response(data=serializer.data)
         if request.method == 'PATCH':
+            # The stored role, not the one claimed by the token.
+            user = get_object_or_404(CustomUser, pk=request.user.pk)
             serializer = self.get_serializer(
-                request.user,
+                user,
                 data=request.data,
                 partial=True
             )
             serializer.is_valid(raise_exception=True)
-            serializer.save(role=request.user.role)
+            serializer.save(role=user.role)
             return Response(data=serializer.data)
 
 
 class SignUpView(views.APIView):
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (IPThrottle, UsernameThrottle)
+    throttle_scope = 'signup'
 
     def post(self, request):
         serializer = SignUpSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
-        send_mail(subject='Code confirmation',
-                  message='Your confirmation is: '
-                          f'{user.confirmation_code}',
-                  from_email=settings.EMAIL_HOST,
-                  recipient_list=[user.email],
-                  fail_silently=False)
+        QueuedEmail.objects.create(
+            subject='Code confirmation',
+            message=f'Your confirmation is: {user.confirmation_code}',
+            from_email=settings.EMAIL_HOST,
+            recipient=user.email
+        )
         return Response({'email': user.email, 'username': user.username},
                         status=status.HTTP_200_OK)
 
 
 class GetTokenView(views.APIView):
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (IPThrottle, UsernameThrottle)
+    throttle_scope = 'token'
 
     def post(self, request):
         serializer = GetTokenSerializer(data=request.data)
@@ -93,17 +126,105 @@ class GetTokenView(views.APIView):
         if confirmation_code == user.confirmation_code:
             user.is_active = True
             user.save()
-            token = AccessToken.for_user(user)
+            token = RoleAccessToken.for_user(user)
             return Response({'token': f'{token}'},
                             status=status.HTTP_200_OK)
         return Response(serializer.errors,
                         status=status.HTTP_400_BAD_REQUEST)
 
 
+class CacheStatsView(views.APIView):
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        return Response(get_stats())
+
+
+class MetricsView(views.APIView):
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        return HttpResponse(
+            export_metrics(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
+
+
+class ExportView(views.APIView):
+    permission_classes = (IsAdmin,)
+
+    def get(self, request, kind, export_format):
+        if kind not in EXPORTS or export_format not in FORMATS:
+            raise Http404
+        content_type = FORMATS[export_format][0]
+        response = StreamingHttpResponse(
+            export(kind, export_format),
+            content_type=f'{content_type}; charset=utf-8'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{kind}.{export_format}"')
+        return response
+
+
+class SearchView(TimedSerializerMixin, generics.ListAPIView):
+    permission_classes = (permissions.AllowAny,)
+    serializer_class = SearchResultSerializer
+
+    def get_queryset(self):
+        query = SearchQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        kinds = query.validated_data.get('type') or KINDS
+        return search(
+            query.validated_data['q'],
+            [kind for kind in KINDS if kind in kinds]
+        )
+
+
+class LeaderboardView(TimedSerializerMixin, CachedResponseMixin,
+                      generics.ListAPIView):
+    """Titles ranked by their Bayesian average score.
+
+    The overall board lives at the root, and boards of a category, genre
+    or year at ``<scope>/<slug or year>/``.
+    """
+    permission_classes = (permissions.AllowAny,)
+    serializer_class = LeaderboardEntrySerializer
+    pagination_class = LeaderboardPagination
+    cache_group = 'titles'
+    slug_models = {
+        LeaderboardEntry.CATEGORY: Category,
+        LeaderboardEntry.GENRE: Genre,
+    }
+
+    def get_board(self):
+        """Return the scope and key of the requested leaderboard."""
+        scope = self.kwargs.get('scope')
+        key = self.kwargs.get('key')
+        if scope is None:
+            return LeaderboardEntry.ALL, 0
+        if scope in self.slug_models:
+            slug_id = get_id(self.slug_models[scope], key)
+            if slug_id is None:
+                raise Http404
+            return scope, slug_id
+        if scope == LeaderboardEntry.YEAR:
+            try:
+                return scope, int(key)
+            except ValueError:
+                raise Http404
+        raise Http404
+
+    def get_queryset(self):
+        return LeaderboardEntry.objects.board(
+            *self.get_board()
+        ).select_related('title__category').prefetch_related('title__genre')
+
+
 class CategoryViewSet(AdminPermissionViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     search_fields = ('name',)
+    cache_group = 'categories'
     lookup_field = 'slug'
 
 
@@ -111,46 +232,110 @@ class GenreViewSet(AdminPermissionViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     search_fields = ('name',)
+    cache_group = 'genres'
     lookup_field = 'slug'
 
 
+def title_modified(title=None, title_id=None):
+    """Return the change marker shared by a title and its feeds."""
+    if title is None:
+        try:
+            title = Title.objects.only('modified').filter(
+                pk=title_id).first()
+        except (TypeError, ValueError):
+            # Not an id; the handler answers 404.
+            return None
+        if title is None:
+            return None
+    return title.modified, f'{title.pk}-{title.modified.timestamp()}'
+
+
 class TitleViewSet(
+    BulkWriteMixin,
+    ConditionalGetMixin,
+    CachedRetrieveMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
     AdminPermissionViewSet
 ):
-    queryset = Title.objects.annotate(rating=Avg('reviews__score'))
+    queryset = Title.objects.select_related('category').prefetch_related(
+        'genre')
     filterset_class = TitleFilterSet
+    cache_group = 'titles'
 
     def get_serializer_class(self):
-        if self.action in ('create', 'partial_update',):
+        if self.action == 'bulk' and self.request.method == 'PATCH':
+            return TitleBulkUpdateSerializer
+        if self.action in ('create', 'partial_update', 'bulk'):
             return TitleCreateUpdateSerializer
         return TitleReadOnlySerializer
 
+    def get_modified(self):
+        if self.detail:
+            return title_modified(title_id=self.kwargs['pk'])
+        # Every change to a listed title bumps the version of its response
+        # cache group, which makes it the ETag of any title list as long as
+        # all processes share that version.
+        version = shared_version(self.cache_group)
+        return None if version is None else (None, version)
 
-class ReviewViewSet(OwnerPermissionViewSet):
+
+class ReviewViewSet(BulkWriteMixin, ConditionalGetMixin,
+                    OwnerPermissionViewSet):
     serializer_class = ReviewSerializer
+    pagination_class = FeedPagination
 
-    def get_title(self):
+    @cached_property
+    def title(self):
         return get_object_or_404(Title, pk=self.kwargs['title_id'])
 
+    def get_serializer_class(self):
+        if self.action == 'bulk' and self.request.method == 'PATCH':
+            return ReviewBulkUpdateSerializer
+        return super().get_serializer_class()
+
+    def get_modified(self):
+        if self.detail:
+            return title_modified(title_id=self.kwargs['title_id'])
+        return title_modified(self.title)
+
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        if self.detail:
+            reviews = Review.objects.filter(title_id=self.kwargs['title_id'])
+        else:
+            reviews = self.title.reviews.all()
+        return reviews.select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        serializer.save(author=self.request.user, title=self.title)
 
 
-class CommentViewSet(OwnerPermissionViewSet):
+class CommentViewSet(ConditionalGetMixin, OwnerPermissionViewSet):
     serializer_class = CommentSerializer
+    pagination_class = FeedPagination
 
-    def get_review(self):
-        title = get_object_or_404(Title, pk=self.kwargs['title_id'])
+    @cached_property
+    def review(self):
         return get_object_or_404(
-            title.reviews.all(), pk=self.kwargs['review_id'])
+            Review.objects.select_related('title'),
+            pk=self.kwargs['review_id'],
+            title_id=self.kwargs['title_id']
+        )
+
+    def get_modified(self):
+        if self.detail:
+            return title_modified(title_id=self.kwargs['title_id'])
+        return title_modified(self.review.title)
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        if self.detail:
+            comments = Comment.objects.filter(
+                review_id=self.kwargs['review_id'],
+                review__title_id=self.kwargs['title_id']
+            )
+        else:
+            comments = self.review.comments.all()
+        return comments.select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        serializer.save(author=self.request.user, review=self.review)
@@ -31,6 +31,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.InstrumentationMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,12 +64,109 @@ TEMPLATES = [
 WSGI_APPLICATION = 'restviewer.wsgi.application'
 
 
-DATABASES = {
-    'default': {
+DATABASE_NAME = getenv('DATABASE_NAME', BASE_DIR / 'db.sqlite3')
+
+# DATABASE_PROFILE picks one of these. sqlite-production lets readers
+# run next to a writer (WAL), syncs to disk only at checkpoints
+# (synchronous=NORMAL: a power loss can drop the last commits, never
+# corrupt the file), reads through a 256 MiB memory map and a 64 MiB
+# page cache, waits up to 20 s for a locked database and keeps each
+# connection open for 10 minutes.
+DATABASE_PROFILES = {
+    'sqlite': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': DATABASE_NAME,
+    },
+    'sqlite-production': {
+        'ENGINE': 'restviewer.sqlite',
+        'NAME': DATABASE_NAME,
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA mmap_size=268435456;'
+                'PRAGMA cache_size=-65536;'
+                'PRAGMA temp_store=MEMORY;'
+            ),
+        },
+    },
+}
+
+DATABASES = {
+    'default': DATABASE_PROFILES[getenv('DATABASE_PROFILE', 'sqlite')],
+}
+
+# DATABASE_REPLICAS lists comma-separated database files holding read-only
+# copies of the default one; each becomes an alias named replica<N> with
+# the settings of the default database. Tests read them from the test
+# database of default.
+DATABASES.update({
+    f'replica{number}': {
+        **DATABASES['default'],
+        'NAME': name.strip(),
+        'TEST': {'MIRROR': 'default'},
     }
+    for number, name in enumerate(
+        filter(None, getenv('DATABASE_REPLICAS', '').split(',')), 1)
+})
+READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['api.replicas.ReadReplicaRouter']
+# Seconds a client reads from the primary after a write of its own.
+REPLICA_STICKY_SECONDS = 5
+
+
+CACHES = {
+    'default': {
+        'BACKEND': getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': getenv('CACHE_LOCATION', 'restviewer'),
+    },
+    # Throttle counters; the backend needs an atomic incr (local memory
+    # or memcached).
+    'throttle': {
+        'BACKEND': getenv(
+            'THROTTLE_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': getenv('THROTTLE_CACHE_LOCATION', 'restviewer-throttle'),
+    },
 }
+if CACHES['throttle']['BACKEND'].endswith('.LocMemCache'):
+    # Keep counters from being culled at the default 300 entries.
+    CACHES['throttle']['OPTIONS'] = {'MAX_ENTRIES': 100000}
+
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 300
+# Seconds a process keeps its category and genre slugs (api.slugs) when
+# no change reaches it through the response cache.
+SLUG_CACHE_TIMEOUT = 60
+
+# Leaderboards rank titles by (score_sum + VOTES * SCORE) / (reviews + VOTES),
+# as if every title had VOTES extra reviews of SCORE. Run
+# rebuild_title_ratings after changing either value.
+LEADERBOARD_PRIOR_VOTES = 10
+LEADERBOARD_PRIOR_SCORE = 5.5
+
+# Read serializers build their output with precompiled field accessors;
+# False renders through DRF's field-by-field path instead.
+FAST_SERIALIZERS = True
+
+# 'orjson' encodes JSON with orjson when it is installed, 'json' always
+# with the standard library.
+JSON_ENCODER = getenv('JSON_ENCODER', 'orjson')
+
+INSTRUMENTATION_SAMPLE_RATE = float(getenv('INSTRUMENTATION_SAMPLE_RATE', 0))
+
+THROTTLE_STORE = getenv('THROTTLE_STORE', 'api.throttling.CacheCounterStore')
+THROTTLE_CACHE_ALIAS = 'throttle'
+# Factor applied to every limit of DEFAULT_THROTTLE_RATES; raise it on a
+# server measured by benchmark_api --mode http.
+THROTTLE_RATE_MULTIPLIER = int(getenv('THROTTLE_RATE_MULTIPLIER', 1))
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -115,13 +214,28 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
     'DEFAULT_PAGINATION_CLASS':
         'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 10,
+    'DEFAULT_THROTTLE_RATES': {
+        'signup_ip': '20/hour',
+        'signup_username': '5/hour',
+        'token_ip': '60/min',
+        'token_username': '10/min',
+    },
 }
 
+# Seconds a cached token version is trusted. A process that does not
+# share the cache of the one bumping a version may answer reads with the
+# old claims until then; writes always load the user.
+TOKEN_VERSION_TIMEOUT = 60
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -0,0 +1,49 @@
+"""SQLite backend taking connection pragmas and a transaction mode.
+
+Two ``OPTIONS`` keys are added to the stock backend, named as in later
+Django releases:
+
+- ``init_command``: SQL run on every new connection, such as pragmas;
+- ``transaction_mode``: ``DEFERRED``, ``IMMEDIATE`` or ``EXCLUSIVE``,
+  used to begin ``atomic`` blocks.
+
+A deferred transaction that reads before it writes has to upgrade its
+lock, and SQLite fails such an upgrade at once, without waiting for the
+busy timeout, when another connection is writing. ``IMMEDIATE`` takes
+the write lock at ``BEGIN``, where the busy timeout applies.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        options = self.settings_dict['OPTIONS']
+        self.init_command = options.get('init_command')
+        self.transaction_mode = options.get('transaction_mode')
+        if self.transaction_mode not in (None, *TRANSACTION_MODES):
+            raise ImproperlyConfigured(
+                f'transaction_mode must be one of '
+                f'{", ".join(TRANSACTION_MODES)}.')
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('init_command', None)
+        params.pop('transaction_mode', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        if self.init_command:
+            conn.executescript(self.init_command)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -5,6 +5,7 @@ from reviews.models import (
     Comment,
     CustomUser,
     Genre,
+    QueuedEmail,
     Review,
     Title
 )
@@ -45,7 +46,10 @@ class GenreAdmin(admin.ModelAdmin):
 
 @admin.register(Title)
 class TitleAdmin(admin.ModelAdmin):
-    list_display = ['id', 'name', 'year', 'description', 'category']
+    list_display = [
+        'id', 'name', 'year', 'description', 'category', 'review_count',
+        'rating'
+    ]
     search_fields = ['name', 'year', 'description', 'genre']
     list_filter = ['category', 'genre', 'year']
 
@@ -62,3 +66,11 @@ class CommentAdmin(admin.ModelAdmin):
     list_display = ['id', 'pub_date', 'author', 'review', 'text']
     search_fields = ['text']
     list_filter = ['pub_date', 'author', 'review']
+
+
+@admin.register(QueuedEmail)
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = ['id', 'recipient', 'subject', 'created', 'send_after',
+                    'attempts', 'sent']
+    search_fields = ['recipient']
+    list_filter = ['sent']
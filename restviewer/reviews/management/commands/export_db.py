@@ -0,0 +1,43 @@
+from pathlib import Path
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.management.sample_db import TABLES, export_table
+
+
+class Command(BaseCommand):
+    help = (
+        'Exports the database to CSV files in the format read by '
+        'import_sample_db'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'directory',
+            type=Path,
+            help='Directory the CSV files are written to.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Rows fetched from the database at a time.'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('Chunk size must be positive.')
+        directory = options['directory']
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+        except OSError as error:
+            raise CommandError(error)
+        for table in TABLES:
+            started = perf_counter()
+            rows = export_table(table, directory, options['chunk_size'])
+            elapsed = perf_counter() - started
+            self.stdout.write(
+                f'{table.filename}: {rows} rows in {elapsed:.2f}s')
+        self.stdout.write(self.style.SUCCESS(
+            f'Data exported to {directory}'))
@@ -0,0 +1,80 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from api.cache import invalidate
+from api.search import search_index_rebuilt
+from reviews.management.sample_db import TABLES, reset_sequences, truncate
+from reviews.management.synthetic_db import SyntheticCatalog
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = (
+        'Fills the database with a seeded synthetic catalog of the given '
+        'size for load tests and benchmarks'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument('--reviews', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='The same seed and sizes always give the same catalog.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Rows inserted and committed per transaction.'
+        )
+        parser.add_argument(
+            '--truncate',
+            action='store_true',
+            help='Empty the catalog and user tables first. Without it the '
+                 'command refuses to run on a database that has data.'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Batch size must be positive.')
+        try:
+            catalog = SyntheticCatalog(
+                options['users'], options['titles'], options['reviews'],
+                options['comments'], options['categories'],
+                options['genres'], options['seed'])
+        except ValueError as error:
+            raise CommandError(error)
+        if options['truncate']:
+            truncate(TABLES)
+        elif any(table.model.objects.exists() for table in TABLES):
+            raise CommandError(
+                'The database already has data; pass --truncate to '
+                'replace it.')
+        started = perf_counter()
+        try:
+            with search_index_rebuilt():
+                catalog.write(options['batch_size'], self.report)
+        except IntegrityError as error:
+            raise CommandError(error)
+        reset_sequences(TABLES)
+        rebuild_started = perf_counter()
+        Title.objects.rebuild_ratings()
+        self.report('ratings', options['titles'],
+                    perf_counter() - rebuild_started)
+        invalidate('categories', 'genres', 'titles')
+        self.stdout.write(self.style.SUCCESS(
+            f'Synthetic catalog generated in '
+            f'{perf_counter() - started:.2f}s'))
+
+    def report(self, name, rows, elapsed):
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(
+            f'{name}: {rows} rows in {elapsed:.2f}s ({rate:.0f} rows/s)')
@@ -1,133 +1,170 @@
-import csv
-
-from django.core.management.base import BaseCommand
-
-from reviews.models import (
-    Category,
-    Comment,
-    CustomUser,
-    Genre,
-    Review,
-    Title
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Queue
+from pathlib import Path
+from queue import Empty
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from api.cache import invalidate
+from reviews.management.sample_db import (
+    CONFLICT_MODES,
+    IGNORE,
+    SAMPLE_DB_DIR,
+    TABLES,
+    keep_pub_dates,
+    read_chunks,
+    ready_tables,
+    reset_sequences,
+    table_by_name,
+    truncate,
+    write_chunk
 )
-
-from restviewer.settings import BASE_DIR
-
-
-def import_users():
-    try:
-        with open(BASE_DIR / 'static/sample_db/users.csv') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                CustomUser.objects.get_or_create(**row)
-    except FileNotFoundError:
-        raise ValueError('users.csv not found!')
-    except Exception as error:
-        print(error)
-
-
-def import_categories():
-    try:
-        with open(BASE_DIR / 'static/sample_db/category.csv') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                Category.objects.get_or_create(**row)
-    except FileNotFoundError:
-        raise ValueError('category.csv not found!')
-    except Exception as error:
-        print(error)
-
-
-def import_genres():
-    try:
-        with open(BASE_DIR / 'static/sample_db/genre.csv') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                Genre.objects.get_or_create(**row)
-    except FileNotFoundError:
-        raise ValueError('genre.csv not found!')
-    except Exception as exception:
-        print(exception)
-
-
-def import_titles():
-    try:
-        with open(BASE_DIR / 'static/sample_db/titles.csv') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                Title.objects.get_or_create(
-                    id=row['id'],
-                    name=row['name'],
-                    year=row['year'],
-                    category=Category.objects.get(id=row['category'])
-                )
-    except FileNotFoundError:
-        raise ValueError('titles.csv not found!')
-    except Exception as exception:
-        print(exception)
-
-
-def import_title_genre_relations():
-    try:
-        with open(BASE_DIR / 'static/sample_db/genre_title.csv') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                Title.genre.through.objects.get_or_create(
-                    title_id=row['title_id'],
-                    genre=Genre.objects.get(id=row['genre_id'])
-                )
-    except FileNotFoundError:
-        raise ValueError('genre_title.csv not found!')
-    except Exception as exception:
-        print(exception)
-
-
-def import_reviews():
-    try:
-        with open(BASE_DIR / 'static/sample_db/review.csv') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                Review.objects.get_or_create(
-                    id=row['id'],
-                    title_id=row['title_id'],
-                    text=row['text'],
-                    author=CustomUser.objects.get(id=row['author']),
-                    score=row['score'],
-                    pub_date=row['pub_date']
-                )
-    except FileNotFoundError:
-        raise ValueError('review.csv not found!')
-    except Exception as exception:
-        print(exception)
-
-
-def import_comments():
-    try:
-        with open(BASE_DIR / 'static/sample_db/comments.csv') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                Comment.objects.get_or_create(
-                    id=row['id'],
-                    review_id=row['review_id'],
-                    text=row['text'],
-                    author=CustomUser.objects.get(id=row['author']),
-                    pub_date=row['pub_date']
-                )
-    except FileNotFoundError:
-        raise ValueError('comments.csv not found!')
-    except Exception as exception:
-        print(exception)
+from reviews.management.parsing import init_worker, parse_table
+from reviews.models import Title
 
 
 class Command(BaseCommand):
     help = 'Imports sample database from CSV files'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--directory',
+            type=Path,
+            default=SAMPLE_DB_DIR,
+            help='Directory with the CSV files, e.g. one written by '
+                 'export_db.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per INSERT statement.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help='Rows read and committed per transaction.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Processes parsing independent CSV files at the same time. '
+                 'Rows are still written by this process only.'
+        )
+        parser.add_argument(
+            '--on-conflict',
+            choices=CONFLICT_MODES,
+            default=IGNORE,
+            help='What to do with rows that already exist: fail, skip '
+                 'them or overwrite them.'
+        )
+        parser.add_argument(
+            '--truncate',
+            action='store_true',
+            help='Empty the sample tables, and the tables referencing '
+                 'them, before importing.'
+        )
+
     def handle(self, *args, **options):
-        import_users()
-        import_categories()
-        import_genres()
-        import_titles()
-        import_title_genre_relations()
-        import_reviews()
-        import_comments()
+        if min(options['batch_size'], options['chunk_size'],
+               options['workers']) < 1:
+            raise CommandError(
+                'Batch size, chunk size and workers must be positive.')
+        if options['truncate']:
+            truncate(TABLES)
+        id_maps = {}
+        try:
+            with keep_pub_dates():
+                if options['workers'] > 1:
+                    self.import_parallel(id_maps, options)
+                else:
+                    for table in TABLES:
+                        self.import_table(table, id_maps, options)
+        except (IntegrityError, ValueError) as error:
+            raise CommandError(error)
+        reset_sequences(TABLES)
+        Title.objects.rebuild_ratings()
+        invalidate('categories', 'genres', 'titles')
         self.stdout.write(self.style.SUCCESS('Data imported successfully'))
+
+    def import_table(self, table, id_maps, options):
+        started = perf_counter()
+        rows = 0
+        for chunk in read_chunks(table, options['chunk_size'],
+                                 options['directory']):
+            rows += write_chunk(table, chunk, options['on_conflict'],
+                                id_maps, options['batch_size'])
+        self.report(table, rows, perf_counter() - started)
+
+    def import_parallel(self, id_maps, options):
+        """Parse ready tables in worker processes and write their chunks.
+
+        A table is handed to a worker once every table it depends on has
+        been written, so independent tables are parsed side by side while
+        this process remains the only database writer.
+        """
+        chunks = Queue(maxsize=options['workers'] * 2)
+        pending = list(TABLES)
+        written = set()
+        running = {}
+        with ProcessPoolExecutor(options['workers'],
+                                 initializer=init_worker,
+                                 initargs=(chunks,)) as pool:
+            try:
+                while pending or running:
+                    for table in ready_tables(pending, written):
+                        pending.remove(table)
+                        running[table.name] = {
+                            'future': pool.submit(parse_table, table.name,
+                                                  options['chunk_size'],
+                                                  options['directory']),
+                            'started': perf_counter(),
+                            'rows': 0,
+                        }
+                    self.write_next_chunk(chunks, running, written,
+                                          id_maps, options)
+            except BaseException:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self.drain(chunks, running)
+                raise
+
+    def write_next_chunk(self, chunks, running, written, id_maps, options):
+        try:
+            name, chunk = chunks.get(timeout=1)
+        except Empty:
+            for state in running.values():
+                if state['future'].done():
+                    state['future'].result()
+            return
+        if isinstance(chunk, Exception):
+            raise chunk
+        state = running[name]
+        if chunk is None:
+            del running[name]
+            written.add(name)
+            self.report(table_by_name(name), state['rows'],
+                        perf_counter() - state['started'])
+            return
+        state['rows'] += write_chunk(
+            table_by_name(name), chunk, options['on_conflict'],
+            id_maps, options['batch_size'])
+
+    @staticmethod
+    def drain(chunks, running):
+        """Unblock workers still sending chunks after a failed import."""
+        while not all(state['future'].done() for state in running.values()):
+            try:
+                chunks.get(timeout=0.1)
+            except Empty:
+                pass
+
+    def report(self, table, rows, elapsed):
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(
+            f'{table.name}: {rows} rows in {elapsed:.2f}s '
+            f'({rate:.0f} rows/s)'
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.cache import invalidate
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = 'Recalculates stored title ratings and leaderboards from reviews'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = Title.objects.rebuild_ratings()
+        invalidate('titles')
+        self.stdout.write(
+            self.style.SUCCESS(f'Ratings rebuilt for {updated} titles'))
@@ -0,0 +1,119 @@
+from datetime import timedelta
+from time import sleep
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from reviews.models import QueuedEmail
+
+
+class Command(BaseCommand):
+    help = 'Sends queued e-mails in batches over one mail connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=5,
+            help='Attempts after which a message is left unsent.'
+        )
+        parser.add_argument(
+            '--retry-delay',
+            type=int,
+            default=60,
+            help='Seconds before the first retry; doubled on every retry.'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the queue instead of exiting when empty.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds between polls of an empty queue with --loop.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = self.send_batch(options)
+            if sent or failed:
+                self.stdout.write(f'Sent {sent}, failed {failed}')
+            elif not options['loop']:
+                break
+            else:
+                sleep(options['interval'])
+
+    def claim_batch(self, options):
+        """Lock a batch of due messages by moving their next attempt.
+
+        The lease keeps other workers off the batch while it is being
+        sent; failed messages get their real retry time afterwards.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            due = QueuedEmail.objects.filter(
+                sent__isnull=True,
+                send_after__lte=now,
+                attempts__lt=options['max_attempts']
+            )
+            if connection.features.has_select_for_update_skip_locked:
+                due = due.select_for_update(skip_locked=True)
+            batch = list(due[:options['batch_size']])
+            QueuedEmail.objects.filter(
+                pk__in=[email.pk for email in batch]
+            ).update(send_after=now + timedelta(
+                seconds=options['retry_delay']))
+        return batch
+
+    def send_batch(self, options):
+        batch = self.claim_batch(options)
+        if not batch:
+            return 0, 0
+        errors = self.deliver(batch)
+        now = timezone.now()
+        sent = []
+        failed = []
+        for email in batch:
+            email.attempts += 1
+            if email.pk in errors:
+                email.last_error = errors[email.pk]
+                email.send_after = now + timedelta(
+                    seconds=options['retry_delay'] * 2 ** (email.attempts - 1))
+                failed.append(email)
+            else:
+                email.sent = now
+                sent.append(email)
+        QueuedEmail.objects.bulk_update(sent, ('sent', 'attempts'))
+        QueuedEmail.objects.bulk_update(
+            failed, ('send_after', 'attempts', 'last_error'))
+        return len(sent), len(failed)
+
+    @staticmethod
+    def deliver(batch):
+        """Send a batch over one connection; return errors by e-mail id."""
+        mail = get_connection()
+        try:
+            mail.open()
+        except Exception as error:
+            return {email.pk: str(error) for email in batch}
+        errors = {}
+        try:
+            for email in batch:
+                try:
+                    EmailMessage(
+                        subject=email.subject,
+                        body=email.message,
+                        from_email=email.from_email,
+                        to=[email.recipient],
+                        connection=mail
+                    ).send()
+                except Exception as error:
+                    errors[email.pk] = str(error)
+        finally:
+            mail.close()
+        return errors
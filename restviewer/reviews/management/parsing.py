@@ -0,0 +1,32 @@
+"""Worker side of the parallel sample import.
+
+The module does not import models at load time, so that spawned worker
+processes can set Django up before the sample tables are imported.
+"""
+import django
+
+queue = None
+
+
+def init_worker(chunk_queue):
+    global queue
+    django.setup()
+    queue = chunk_queue
+
+
+def parse_table(name, chunk_size, directory):
+    """Send parsed chunks of a sample table to the writer process.
+
+    The table name is sent with every message; ``None`` marks the end of
+    the table and an exception instance reports a parsing failure.
+    """
+    from reviews.management.sample_db import read_chunks, table_by_name
+
+    try:
+        for chunk in read_chunks(table_by_name(name), chunk_size,
+                                 directory):
+            queue.put((name, chunk))
+    except Exception as error:
+        queue.put((name, error))
+    else:
+        queue.put((name, None))
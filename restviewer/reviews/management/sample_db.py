@@ -0,0 +1,348 @@
+import csv
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from reviews.models import (
+    Category,
+    Comment,
+    CustomUser,
+    Genre,
+    NameSlugModel,
+    Review,
+    Title
+)
+
+from restviewer.settings import BASE_DIR
+
+SAMPLE_DB_DIR = BASE_DIR / 'static/sample_db'
+
+ERROR = 'error'
+IGNORE = 'ignore'
+UPDATE = 'update'
+CONFLICT_MODES = (ERROR, IGNORE, UPDATE)
+
+
+def optional_id(value):
+    return int(value) if value else None
+
+
+def optional_text(value):
+    return value or None
+
+
+def format_value(value):
+    """Write a model value the way ``SampleTable.parse`` reads it back."""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat(timespec='milliseconds').replace(
+            '+00:00', 'Z')
+    return str(value)
+
+
+class SampleTable:
+    """A CSV file of the sample database and the model it is loaded into.
+
+    Rows are parsed into plain dicts first, so parsing does not touch the
+    database, and are turned into model instances when a chunk is written.
+    Foreign keys are assigned by id; the only ids remapped on the way are
+    those of tables listed in ``mapped``. Columns listed in ``optional``
+    may be missing from a file, in which case the field keeps its default
+    and is not overwritten on update.
+    """
+
+    def __init__(self, name, filename, model, columns, fields,
+                 depends_on=(), mapped=None, optional=()):
+        self.name = name
+        self.filename = filename
+        self.model = model
+        self.columns = columns
+        self.fields = fields
+        self.depends_on = depends_on
+        self.mapped = mapped or {}
+        self.optional = optional
+
+    def path(self, directory=SAMPLE_DB_DIR):
+        return directory / self.filename
+
+    def parse(self, row):
+        return {
+            field: convert(row[column])
+            for column, (field, convert) in self.columns.items()
+            if column in row or column not in self.optional
+        }
+
+    def build(self, values, id_maps):
+        values = dict(values)
+        for field, table in self.mapped.items():
+            if values[field] is not None:
+                values[field] = id_maps[table][values[field]]
+        return self.model(**values)
+
+    def write(self, chunk, on_conflict, id_maps, batch_size):
+        objs = [self.build(values, id_maps) for values in chunk]
+        if on_conflict == UPDATE:
+            existing = set(self.model.objects.filter(
+                pk__in=[obj.pk for obj in objs]
+            ).values_list('pk', flat=True))
+            self.model.objects.bulk_update(
+                [obj for obj in objs if obj.pk in existing],
+                [field for field in self.fields if field in chunk[0]],
+                batch_size=batch_size
+            )
+            objs = [obj for obj in objs if obj.pk not in existing]
+        self.model.objects.bulk_create(
+            objs,
+            batch_size=batch_size,
+            ignore_conflicts=on_conflict == IGNORE
+        )
+        return len(chunk)
+
+
+class NameSlugTable(SampleTable):
+    """Categories and genres share the ``NameSlugModel`` parent table.
+
+    Django cannot bulk create multi-table inherited models, and the sample
+    ids of both tables overlap in the shared parent table. Parent rows are
+    therefore bulk created without ids and matched back by their unique
+    slug, and the ``id_maps`` entry for the table translates sample ids to
+    the resulting primary keys.
+    """
+
+    def __init__(self, name, filename, model):
+        super().__init__(
+            name,
+            filename,
+            model,
+            columns={
+                'id': ('id', int),
+                'name': ('name', str),
+                'slug': ('slug', str),
+            },
+            fields=('name',)
+        )
+
+    def write(self, chunk, on_conflict, id_maps, batch_size):
+        ids = id_maps.setdefault(self.name, {})
+        slugs = [values['slug'] for values in chunk]
+        existing = dict(self.model.objects.filter(
+            slug__in=slugs
+        ).values_list('slug', 'pk'))
+        if existing and on_conflict == ERROR:
+            raise ValueError(
+                f'{self.filename}: slugs already exist: '
+                f'{", ".join(sorted(existing))}')
+        if on_conflict == UPDATE:
+            NameSlugModel.objects.bulk_update(
+                [NameSlugModel(pk=existing[values['slug']],
+                               name=values['name'])
+                 for values in chunk if values['slug'] in existing],
+                self.fields,
+                batch_size=batch_size
+            )
+        created = [values for values in chunk
+                   if values['slug'] not in existing]
+        NameSlugModel.objects.bulk_create(
+            [NameSlugModel(name=values['name'], slug=values['slug'])
+             for values in created],
+            batch_size=batch_size
+        )
+        parents = dict(NameSlugModel.objects.filter(
+            slug__in=[values['slug'] for values in created]
+        ).values_list('slug', 'pk'))
+        for values in created:
+            # Child rows are few; save them the way fixtures do, without
+            # touching the parent row again.
+            self.model(
+                nameslugmodel_ptr_id=parents[values['slug']],
+                name=values['name'],
+                slug=values['slug']
+            ).save_base(raw=True)
+        existing.update(parents)
+        for values in chunk:
+            ids[values['id']] = existing[values['slug']]
+        return len(chunk)
+
+
+TABLES = (
+    SampleTable(
+        'users',
+        'users.csv',
+        CustomUser,
+        columns={
+            'id': ('id', int),
+            'username': ('username', str),
+            'email': ('email', str),
+            'role': ('role', str),
+            'bio': ('bio', optional_text),
+            'first_name': ('first_name', str),
+            'last_name': ('last_name', str),
+        },
+        fields=('username', 'email', 'role', 'bio', 'first_name',
+                'last_name')
+    ),
+    NameSlugTable('category', 'category.csv', Category),
+    NameSlugTable('genre', 'genre.csv', Genre),
+    SampleTable(
+        'titles',
+        'titles.csv',
+        Title,
+        columns={
+            'id': ('id', int),
+            'name': ('name', str),
+            'year': ('year', int),
+            'category': ('category_id', optional_id),
+            'description': ('description', optional_text),
+        },
+        fields=('name', 'year', 'category_id', 'description'),
+        depends_on=('category',),
+        mapped={'category_id': 'category'},
+        optional=('description',)
+    ),
+    SampleTable(
+        'genre_title',
+        'genre_title.csv',
+        Title.genre.through,
+        columns={
+            'id': ('id', int),
+            'title_id': ('title_id', int),
+            'genre_id': ('genre_id', int),
+        },
+        fields=('title_id', 'genre_id'),
+        depends_on=('titles', 'genre'),
+        mapped={'genre_id': 'genre'}
+    ),
+    SampleTable(
+        'reviews',
+        'review.csv',
+        Review,
+        columns={
+            'id': ('id', int),
+            'title_id': ('title_id', int),
+            'text': ('text', str),
+            'author': ('author_id', int),
+            'score': ('score', int),
+            'pub_date': ('pub_date', parse_datetime),
+        },
+        fields=('title_id', 'text', 'author_id', 'score', 'pub_date'),
+        depends_on=('users', 'titles')
+    ),
+    SampleTable(
+        'comments',
+        'comments.csv',
+        Comment,
+        columns={
+            'id': ('id', int),
+            'review_id': ('review_id', int),
+            'text': ('text', str),
+            'author': ('author_id', int),
+            'pub_date': ('pub_date', parse_datetime),
+        },
+        fields=('review_id', 'text', 'author_id', 'pub_date'),
+        depends_on=('users', 'reviews')
+    ),
+)
+
+
+def table_by_name(name):
+    for table in TABLES:
+        if table.name == name:
+            return table
+    raise ValueError(f'Unknown sample table {name}.')
+
+
+def ready_tables(pending, written):
+    """Return pending tables whose dependencies have all been written."""
+    return [table for table in pending
+            if set(table.depends_on) <= written]
+
+
+def read_chunks(table, chunk_size, directory=SAMPLE_DB_DIR):
+    """Yield lists of parsed rows of at most ``chunk_size`` items."""
+    try:
+        csvfile = open(table.path(directory), encoding='utf-8', newline='')
+    except FileNotFoundError:
+        raise ValueError(f'{table.filename} not found!')
+    with csvfile:
+        chunk = []
+        for row in csv.DictReader(csvfile):
+            chunk.append(table.parse(row))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def export_rows(table, chunk_size):
+    """Yield the header and the rows of a table in its sample format."""
+    fields = [field for field, convert in table.columns.values()]
+    yield list(table.columns)
+    rows = table.model.objects.order_by('pk').values_list(*fields)
+    for values in rows.iterator(chunk_size=chunk_size):
+        yield [format_value(value) for value in values]
+
+
+def export_table(table, directory, chunk_size):
+    """Write a table to its CSV file and return the number of rows."""
+    with open(table.path(directory), 'w', encoding='utf-8',
+              newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        rows = -1
+        for row in export_rows(table, chunk_size):
+            writer.writerow(row)
+            rows += 1
+    return rows
+
+
+def write_chunk(table, chunk, on_conflict, id_maps, batch_size):
+    with transaction.atomic():
+        return table.write(chunk, on_conflict, id_maps, batch_size)
+
+
+def truncate(tables):
+    """Empty the tables (and tables referencing them) before a reload."""
+    db_tables = set()
+    for table in tables:
+        db_tables.add(table.model._meta.db_table)
+        for parent in table.model._meta.get_parent_list():
+            db_tables.add(parent._meta.db_table)
+    sql_list = connection.ops.sql_flush(
+        no_style(),
+        sorted(db_tables),
+        reset_sequences=True,
+        allow_cascade=True
+    )
+    with transaction.atomic():
+        connection.ops.execute_sql_flush(sql_list)
+
+
+def reset_sequences(tables):
+    """Move id sequences past the explicitly inserted sample ids."""
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [table.model for table in tables])
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+@contextmanager
+def keep_pub_dates():
+    """Store sample ``pub_date`` values instead of the insertion time."""
+    fields = [
+        field for model in (Review, Comment)
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
@@ -0,0 +1,197 @@
+"""Seeded generator of large synthetic catalogs for benchmarks.
+
+Titles, genre links, reviews and comments are inserted with plain
+``executemany`` statements instead of model instances, which is what
+makes millions of rows practical. Values are prepared with the model
+fields, so the rows are the same ones the ORM would write.
+"""
+from datetime import timedelta
+from random import Random
+from time import perf_counter
+from uuid import UUID
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from reviews.models import (
+    Category,
+    Comment,
+    CustomUser,
+    Genre,
+    Review,
+    Title
+)
+
+from api.export import chunks
+
+WORDS = (
+    'story', 'plot', 'actor', 'music', 'scene', 'ending', 'hero', 'voice',
+    'great', 'boring', 'brilliant', 'slow', 'dark', 'funny', 'classic',
+    'sound', 'camera', 'script', 'twist', 'drama', 'album', 'novel', 'game',
+    'world', 'love', 'war', 'night', 'city', 'road', 'river', 'dream',
+)
+FIRST_YEAR = 1900
+LAST_YEAR = 2020
+
+
+class RowWriter:
+    """Inserts tuples of field values into the table of a model.
+
+    Concrete fields missing from ``fields`` get their default value, and
+    only values of types the database driver cannot take as they are go
+    through the field's ``get_db_prep_save()``.
+    """
+
+    PREPARED_TYPES = ('DateTimeField', 'UUIDField')
+
+    def __init__(self, model, fields, batch_size):
+        self.fields = [model._meta.get_field(name) for name in fields]
+        self.defaults = [
+            field.get_db_prep_save(field.get_default(), connection)
+            for field in self.default_fields(model)
+        ]
+        quote = connection.ops.quote_name
+        columns = ', '.join(
+            quote(field.column)
+            for field in self.fields + self.default_fields(model))
+        values = ', '.join(['%s'] * (len(self.fields) + len(self.defaults)))
+        self.sql = (f'INSERT INTO {quote(model._meta.db_table)} '
+                    f'({columns}) VALUES ({values})')
+        self.batch_size = batch_size
+
+    def default_fields(self, model):
+        return [field for field in model._meta.concrete_fields
+                if field not in self.fields and not field.primary_key]
+
+    def prepare(self, row):
+        return [
+            field.get_db_prep_save(value, connection)
+            if field.get_internal_type() in self.PREPARED_TYPES else value
+            for field, value in zip(self.fields, row)
+        ] + self.defaults
+
+    def write(self, rows):
+        count = 0
+        with connection.cursor() as cursor:
+            for chunk in chunks(rows, self.batch_size):
+                with transaction.atomic():
+                    cursor.executemany(
+                        self.sql, [self.prepare(row) for row in chunk])
+                count += len(chunk)
+        return count
+
+
+class SyntheticCatalog:
+    """Rows of a catalog of the given size, the same for the same seed.
+
+    Reviews go round the titles, each pass taking the next user as the
+    author, so no user reviews a title twice.
+    """
+
+    def __init__(self, users, titles, reviews, comments, categories=10,
+                 genres=30, seed=0):
+        if reviews > titles * users:
+            raise ValueError(
+                'Every user can review a title once: reviews cannot '
+                'exceed titles * users.')
+        if min(users, titles, categories, genres) < 1:
+            raise ValueError(
+                'Users, titles, categories and genres must be positive.')
+        if comments and not reviews:
+            raise ValueError('Comments need reviews to comment on.')
+        self.users = users
+        self.titles = titles
+        self.reviews = reviews
+        self.comments = comments
+        self.categories = categories
+        self.genres = genres
+        self.seed = seed
+        self.started = timezone.now() - timedelta(
+            seconds=reviews + comments)
+
+    def random(self, name):
+        return Random(f'{self.seed}:{name}')
+
+    @staticmethod
+    def text(random, words):
+        return ' '.join(random.choices(WORDS, k=words)).capitalize()
+
+    def create_name_slugs(self):
+        """Create categories and genres, returning their primary keys."""
+        categories = [
+            Category.objects.create(name=f'Category {number}',
+                                    slug=f'category-{number}').pk
+            for number in range(1, self.categories + 1)
+        ]
+        genres = [
+            Genre.objects.create(name=f'Genre {number}',
+                                 slug=f'genre-{number}').pk
+            for number in range(1, self.genres + 1)
+        ]
+        return categories, genres
+
+    def user_rows(self):
+        random = self.random('users')
+        for user_id in range(1, self.users + 1):
+            yield (user_id, f'user{user_id}', f'user{user_id}@example.com',
+                   CustomUser.USER, '!', self.started,
+                   str(UUID(int=random.getrandbits(128))))
+
+    def title_rows(self, categories):
+        random = self.random('titles')
+        for title_id in range(1, self.titles + 1):
+            yield (title_id, f'{self.text(random, 3)} {title_id}',
+                   random.randint(FIRST_YEAR, LAST_YEAR),
+                   self.text(random, 20), random.choice(categories),
+                   self.started)
+
+    def genre_title_rows(self, genres):
+        random = self.random('genre_title')
+        for title_id in range(1, self.titles + 1):
+            for genre_id in random.sample(genres, random.randint(1, 3)):
+                yield title_id, genre_id
+
+    def review_rows(self):
+        random = self.random('reviews')
+        for review_id in range(1, self.reviews + 1):
+            title_id = (review_id - 1) % self.titles + 1
+            author_id = (review_id - 1) // self.titles + 1
+            yield (review_id, title_id, author_id, random.randint(1, 10),
+                   self.text(random, 30),
+                   self.started + timedelta(seconds=review_id))
+
+    def comment_rows(self):
+        random = self.random('comments')
+        for comment_id in range(1, self.comments + 1):
+            yield (comment_id, random.randint(1, self.reviews),
+                   random.randint(1, self.users), self.text(random, 15),
+                   self.started + timedelta(
+                       seconds=self.reviews + comment_id))
+
+    def write(self, batch_size, report):
+        """Insert every table, calling ``report(name, rows, seconds)``."""
+        started = perf_counter()
+        categories, genres = self.create_name_slugs()
+        report('categories and genres', self.categories + self.genres,
+               perf_counter() - started)
+        tables = (
+            ('users', CustomUser,
+             ('id', 'username', 'email', 'role', 'password', 'date_joined',
+              'confirmation_code'),
+             self.user_rows()),
+            ('titles', Title,
+             ('id', 'name', 'year', 'description', 'category', 'modified'),
+             self.title_rows(categories)),
+            ('genre_title', Title.genre.through, ('title', 'genre'),
+             self.genre_title_rows(genres)),
+            ('reviews', Review,
+             ('id', 'title', 'author', 'score', 'text', 'pub_date'),
+             self.review_rows()),
+            ('comments', Comment,
+             ('id', 'review', 'author', 'text', 'pub_date'),
+             self.comment_rows()),
+        )
+        for name, model, fields, rows in tables:
+            started = perf_counter()
+            count = RowWriter(model, fields, batch_size).write(rows)
+            report(name, count, perf_counter() - started)
@@ -0,0 +1,43 @@
+# Generated by Django 3.2 on 2026-10-18 10:39
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_ratings(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Title = apps.get_model('reviews', 'Title')
+    totals = Review.objects.values('title').annotate(
+        count=Count('pk'), total=Sum('score'))
+    for row in totals.iterator():
+        Title.objects.filter(pk=row['title']).update(
+            review_count=row['count'],
+            score_sum=row['total'],
+            rating=row['total'] / row['count']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Rating'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Review count'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Score sum'),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2 on 2026-10-18 10:49
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=256, verbose_name='Subject')),
+                ('message', models.TextField(verbose_name='Message')),
+                ('from_email', models.CharField(max_length=254, verbose_name='From')),
+                ('recipient', models.EmailField(max_length=254, verbose_name='To')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created')),
+                ('send_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Send after')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Attempts')),
+                ('sent', models.DateTimeField(blank=True, null=True, verbose_name='Sent')),
+                ('last_error', models.TextField(blank=True, verbose_name='Last error')),
+            ],
+            options={
+                'verbose_name': 'queued e-mail',
+                'verbose_name_plural': 'Queued e-mails',
+                'ordering': ('send_after', 'id'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='queuedemail',
+            index=models.Index(fields=['sent', 'send_after'], name='queuedemail_pending_idx'),
+        ),
+    ]
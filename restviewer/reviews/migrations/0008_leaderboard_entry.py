@@ -0,0 +1,65 @@
+# Generated by Django 3.2 on 2026-10-18 11:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_leaderboards(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    LeaderboardEntry = apps.get_model('reviews', 'LeaderboardEntry')
+    votes = settings.LEADERBOARD_PRIOR_VOTES
+    prior = votes * settings.LEADERBOARD_PRIOR_SCORE
+    scores = {}
+    entries = []
+    for pk, category_id, year, count, total in Title.objects.values_list(
+            'pk', 'category_id', 'year', 'review_count', 'score_sum'
+    ).iterator():
+        score = scores[pk] = (total + prior) / (count + votes) if count else None
+        entries.append(LeaderboardEntry(
+            scope='all', key=0, title_id=pk, score=score))
+        entries.append(LeaderboardEntry(
+            scope='year', key=year, title_id=pk, score=score))
+        if category_id is not None:
+            entries.append(LeaderboardEntry(
+                scope='category', key=category_id, title_id=pk, score=score))
+    for title_id, genre_id in Title.genre.through.objects.values_list(
+            'title_id', 'genre_id').iterator():
+        entries.append(LeaderboardEntry(
+            scope='genre', key=genre_id, title_id=title_id,
+            score=scores[title_id]))
+    LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_user_token_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('all', 'all'), ('category', 'category'), ('genre', 'genre'), ('year', 'year')], max_length=10, verbose_name='Scope')),
+                ('key', models.IntegerField(verbose_name='Category, genre or year')),
+                ('score', models.FloatField(blank=True, null=True, verbose_name='Score')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='reviews.title', verbose_name='Title')),
+            ],
+            options={
+                'verbose_name': 'leaderboard entry',
+                'verbose_name_plural': 'Leaderboard entries',
+                'default_related_name': 'leaderboard_entries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['scope', 'key', '-score', 'title'], name='leaderboard_rank_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('scope', 'key', 'title'), name='unique_leaderboard_title'),
+        ),
+        migrations.RunPython(fill_leaderboards, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,24 @@
 import uuid
 
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    FloatField,
+    OuterRef,
+    Subquery,
+    Sum,
+    When
+)
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
 
 from api.validators import year_validator
 from api.mixins import UsernameValidate
+from api.token_versions import set_token_version
 
 from api.variable import LIMIT_NAME_LENGTH, LIMIT_EMAIL_LENGTH
 
@@ -45,6 +59,30 @@ class CustomUser(AbstractUser):
                                          blank=True,
                                          null=True,
                                          default=uuid.uuid4)
+    token_version = models.PositiveIntegerField(default=0, editable=False)
+
+    TOKEN_CLAIM_FIELDS = ('role', 'is_superuser', 'is_active')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_claims = instance._token_claims()
+        return instance
+
+    def _token_claims(self):
+        return tuple(
+            self.__dict__.get(field) for field in self.TOKEN_CLAIM_FIELDS)
+
+    def save(self, *args, **kwargs):
+        saved_claims = getattr(self, '_saved_claims', None)
+        if saved_claims is not None and saved_claims != self._token_claims():
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self._saved_claims = self._token_claims()
+        set_token_version(self.pk, self.token_version)
 
     @property
     def is_admin(self):
@@ -95,6 +133,62 @@ class Genre(NameSlugModel):
         return self.name
 
 
+class TitleQuerySet(models.QuerySet):
+
+    def touch(self):
+        """Mark titles, and the reviews and comments under them, changed."""
+        return self.update(modified=timezone.now())
+
+    def apply_review_delta(self, count, score):
+        """Shift stored review totals and recompute the average rating."""
+        review_count = F('review_count') + count
+        score_sum = F('score_sum') + score
+        self.update(
+            review_count=review_count,
+            score_sum=score_sum,
+            rating=Cast(score_sum, FloatField()) / NullIf(review_count, 0)
+        )
+        LeaderboardEntry.objects.filter(title__in=self).update_scores()
+
+    def rebuild_ratings(self):
+        """Recalculate stored review totals, and leaderboards, from the
+        reviews table."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        updated = self.update(
+            review_count=Coalesce(
+                Subquery(reviews.annotate(count=Count('pk')).values('count')),
+                0
+            ),
+            score_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0
+            ),
+            rating=Subquery(reviews.annotate(
+                average=Cast(Sum('score'), FloatField()) / Count('pk')
+            ).values('average'))
+        )
+        LeaderboardEntry.objects.rebuild(self)
+        return updated
+
+    def with_leaderboard_score(self):
+        """Annotate the Bayesian average ranking titles on leaderboards.
+
+        It is NULL for titles without reviews, which are left off.
+        """
+        votes = settings.LEADERBOARD_PRIOR_VOTES
+        return self.annotate(leaderboard_score=Case(
+            When(
+                review_count__gt=0,
+                then=(Cast('score_sum', FloatField())
+                      + votes * settings.LEADERBOARD_PRIOR_SCORE)
+                / (F('review_count') + votes)
+            ),
+            output_field=FloatField()
+        ))
+
+
 class Title(models.Model):
     name = models.CharField(
         verbose_name='Name',
@@ -122,15 +216,58 @@ class Title(models.Model):
         blank=True,
         null=True
     )
+    review_count = models.PositiveIntegerField(
+        verbose_name='Review count',
+        default=0,
+        editable=False
+    )
+    score_sum = models.PositiveIntegerField(
+        verbose_name='Score sum',
+        default=0,
+        editable=False
+    )
+    rating = models.FloatField(
+        verbose_name='Rating',
+        blank=True,
+        null=True,
+        editable=False
+    )
+    modified = models.DateTimeField(
+        verbose_name='Modified',
+        auto_now=True
+    )
+
+    REVIEW_TOTALS = ('review_count', 'score_sum', 'rating')
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         default_related_name = 'titles'
         verbose_name = 'title'
         verbose_name_plural = 'Titles'
+        indexes = [
+            models.Index(fields=['year'], name='title_year_idx'),
+            models.Index(fields=['name'], name='title_name_idx'),
+            models.Index(fields=['rating'], name='title_rating_idx'),
+            models.Index(
+                fields=['review_count'], name='title_review_count_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Review writes shift the totals in the database; an instance
+        # loaded before one of them would write back its stale copy.
+        if (not self._state.adding and self.pk is not None
+                and kwargs.get('update_fields') is None):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.REVIEW_TOTALS
+            ]
+        super().save(*args, **kwargs)
+
 
 class AuthorTextPubDateModel(models.Model):
     text = models.TextField('Text')
@@ -156,10 +293,42 @@ class Review(AuthorTextPubDateModel):
             models.UniqueConstraint(
                 fields=['author', 'title'], name='unique_author_title')
         ]
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_title_pub_date_idx'),
+            models.Index(fields=['pub_date'], name='review_pub_date_idx'),
+            models.Index(fields=['score'], name='review_score_idx'),
+        ]
 
     def __str__(self):
         return f'{self.author} rated {self.title}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_rating_state()
+        return instance
+
+    def _remember_rating_state(self):
+        self._saved_title_id = self.__dict__.get('title_id')
+        self._saved_score = self.__dict__.get('score')
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            adding = self._state.adding
+            super().save(*args, **kwargs)
+            titles = Title.objects.filter(pk=self.title_id)
+            if adding:
+                titles.apply_review_delta(1, self.score)
+            elif self._saved_title_id != self.title_id:
+                previous = Title.objects.filter(pk=self._saved_title_id)
+                previous.apply_review_delta(-1, -self._saved_score)
+                titles.apply_review_delta(1, self.score)
+            elif self._saved_score != self.score:
+                titles.apply_review_delta(0, self.score - self._saved_score)
+        self._remember_rating_state()
+
 
 class Comment(AuthorTextPubDateModel):
     review = models.ForeignKey(
@@ -169,6 +338,141 @@ class Comment(AuthorTextPubDateModel):
         default_related_name = 'comments'
         verbose_name = 'comments'
         verbose_name_plural = 'Comments'
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='comment_review_pub_date_idx'),
+            models.Index(fields=['pub_date'], name='comment_pub_date_idx'),
+        ]
 
     def __str__(self):
         return f'{self.author} comments "{self.review}"'
+
+
+class LeaderboardQuerySet(models.QuerySet):
+    REFRESH_CHUNK_SIZE = 2000
+
+    def update_scores(self):
+        """Copy the current score of each entry's title."""
+        return self.update(score=Subquery(
+            Title.objects.filter(
+                pk=OuterRef('title_id')
+            ).with_leaderboard_score().values('leaderboard_score')
+        ))
+
+    def refresh(self, titles):
+        """Rewrite the entries of titles whose category, year or genres
+        may have changed."""
+        entries = []
+        scores = {}
+        rows = titles.with_leaderboard_score().values_list(
+            'pk', 'category_id', 'year', 'leaderboard_score')
+        for title_id, category_id, year, score in rows:
+            scores[title_id] = score
+            entries.append(LeaderboardEntry(
+                scope=LeaderboardEntry.ALL, key=0, title_id=title_id,
+                score=score))
+            entries.append(LeaderboardEntry(
+                scope=LeaderboardEntry.YEAR, key=year, title_id=title_id,
+                score=score))
+            if category_id is not None:
+                entries.append(LeaderboardEntry(
+                    scope=LeaderboardEntry.CATEGORY, key=category_id,
+                    title_id=title_id, score=score))
+        genres = Title.genre.through.objects.filter(
+            title_id__in=list(scores)).values_list('title_id', 'genre_id')
+        for title_id, genre_id in genres:
+            entries.append(LeaderboardEntry(
+                scope=LeaderboardEntry.GENRE, key=genre_id,
+                title_id=title_id, score=scores[title_id]))
+        with transaction.atomic(savepoint=False):
+            self.filter(title_id__in=list(scores)).delete()
+            self.bulk_create(entries)
+
+    def rebuild(self, titles):
+        """Refresh the entries of any number of titles, a chunk at a time."""
+        ids = titles.order_by('pk').values_list('pk', flat=True)
+        chunk = []
+        for title_id in ids.iterator(chunk_size=self.REFRESH_CHUNK_SIZE):
+            chunk.append(title_id)
+            if len(chunk) == self.REFRESH_CHUNK_SIZE:
+                self.refresh(Title.objects.filter(pk__in=chunk))
+                chunk = []
+        if chunk:
+            self.refresh(Title.objects.filter(pk__in=chunk))
+
+    def board(self, scope, key=0):
+        """Ranked titles of one leaderboard, best first."""
+        return self.filter(
+            scope=scope, key=key, score__isnull=False
+        ).order_by('-score', 'title_id')
+
+
+class LeaderboardEntry(models.Model):
+    """A title's place on one of the leaderboards it belongs to.
+
+    Every title has an entry on the overall board (key 0), on the board
+    of its year and category, and on the board of each of its genres, so
+    ranking a board is a range read of ``leaderboard_rank_idx``.
+    """
+    ALL = 'all'
+    CATEGORY = 'category'
+    GENRE = 'genre'
+    YEAR = 'year'
+    SCOPE_CHOICES = (
+        (ALL, 'all'),
+        (CATEGORY, 'category'),
+        (GENRE, 'genre'),
+        (YEAR, 'year'),
+    )
+
+    scope = models.CharField('Scope', max_length=10, choices=SCOPE_CHOICES)
+    key = models.IntegerField('Category, genre or year')
+    title = models.ForeignKey(
+        Title, on_delete=models.CASCADE, verbose_name='Title')
+    score = models.FloatField('Score', blank=True, null=True)
+
+    objects = LeaderboardQuerySet.as_manager()
+
+    class Meta:
+        default_related_name = 'leaderboard_entries'
+        verbose_name = 'leaderboard entry'
+        verbose_name_plural = 'Leaderboard entries'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['scope', 'key', 'title'],
+                name='unique_leaderboard_title')
+        ]
+        indexes = [
+            models.Index(
+                fields=['scope', 'key', '-score', 'title'],
+                name='leaderboard_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.title} on {self.scope} {self.key}'
+
+
+class QueuedEmail(models.Model):
+    subject = models.CharField('Subject', max_length=256)
+    message = models.TextField('Message')
+    from_email = models.CharField('From', max_length=LIMIT_EMAIL_LENGTH)
+    recipient = models.EmailField('To', max_length=LIMIT_EMAIL_LENGTH)
+    created = models.DateTimeField('Created', auto_now_add=True)
+    send_after = models.DateTimeField('Send after', default=timezone.now)
+    attempts = models.PositiveSmallIntegerField('Attempts', default=0)
+    sent = models.DateTimeField('Sent', blank=True, null=True)
+    last_error = models.TextField('Last error', blank=True)
+
+    class Meta:
+        ordering = ('send_after', 'id')
+        verbose_name = 'queued e-mail'
+        verbose_name_plural = 'Queued e-mails'
+        indexes = [
+            models.Index(
+                fields=['sent', 'send_after'],
+                name='queuedemail_pending_idx')
+        ]
+
+    def __str__(self):
+        return f'{self.subject} to {self.recipient}'
@@ -0,0 +1,92 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete
+)
+from django.dispatch import receiver
+
+from api.token_versions import forget_token_version
+from reviews.models import (
+    Category,
+    Comment,
+    CustomUser,
+    Genre,
+    LeaderboardEntry,
+    Review,
+    Title
+)
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_from_rating(sender, instance, **kwargs):
+    Title.objects.filter(pk=instance.title_id).apply_review_delta(
+        -1, -instance.score)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def touch_review_title(sender, instance, **kwargs):
+    Title.objects.filter(pk=instance.title_id).touch()
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_comment_title(sender, instance, **kwargs):
+    Title.objects.filter(reviews=instance.review_id).touch()
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_category_titles(sender, instance, **kwargs):
+    Title.objects.filter(category=instance).touch()
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def touch_genre_titles(sender, instance, **kwargs):
+    Title.objects.filter(genre=instance).touch()
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_titles_on_genre_change(sender, instance, action, reverse, pk_set,
+                                 **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            Title.objects.filter(pk=instance.pk).touch()
+    elif action in ('post_add', 'post_remove'):
+        Title.objects.filter(pk__in=pk_set).touch()
+    elif action == 'pre_clear':
+        Title.objects.filter(genre=instance).touch()
+
+
+@receiver(post_save, sender=Title)
+def refresh_title_leaderboards(sender, instance, **kwargs):
+    LeaderboardEntry.objects.refresh(Title.objects.filter(pk=instance.pk))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def refresh_genre_leaderboards(sender, instance, action, reverse, pk_set,
+                               **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            LeaderboardEntry.objects.refresh(
+                Title.objects.filter(pk=instance.pk))
+    elif action in ('post_add', 'post_remove'):
+        LeaderboardEntry.objects.refresh(Title.objects.filter(pk__in=pk_set))
+    elif action == 'pre_clear':
+        LeaderboardEntry.objects.filter(
+            scope=LeaderboardEntry.GENRE, key=instance.pk).delete()
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Genre)
+def delete_leaderboard(sender, instance, **kwargs):
+    scope = (LeaderboardEntry.CATEGORY if sender is Category
+             else LeaderboardEntry.GENRE)
+    LeaderboardEntry.objects.filter(scope=scope, key=instance.pk).delete()
+
+
+@receiver(post_delete, sender=CustomUser)
+def revoke_user_tokens(sender, instance, **kwargs):
+    forget_token_version(instance.pk)
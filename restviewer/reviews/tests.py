@@ -0,0 +1,277 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from reviews.models import (
+    Category,
+    CustomUser,
+    Genre,
+    LeaderboardEntry,
+    QueuedEmail,
+    Review,
+    Title
+)
+
+
+class RatingTotalsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Film', slug='film')
+        cls.titles = [
+            Title.objects.create(name=f'Title {number}', year=2000,
+                                 category=category)
+            for number in range(2)
+        ]
+        cls.users = [
+            CustomUser.objects.create(
+                username=f'user{number}',
+                email=f'user{number}@restviewer.test')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        self.reviews = [
+            Review.objects.create(
+                title=self.titles[0], author=user, text='Review.',
+                score=score)
+            for user, score in zip(self.users, (3, 8, 10))
+        ]
+
+    def assert_totals_are_rebuilt_alike(self):
+        fields = ('pk', 'review_count', 'score_sum', 'rating')
+        stored = list(Title.objects.order_by('pk').values_list(*fields))
+        Title.objects.rebuild_ratings()
+        self.assertEqual(
+            stored, list(Title.objects.order_by('pk').values_list(*fields)))
+
+    def test_create(self):
+        title = Title.objects.get(pk=self.titles[0].pk)
+        self.assertEqual(
+            (title.review_count, title.score_sum, title.rating), (3, 21, 7))
+        self.assert_totals_are_rebuilt_alike()
+
+    def test_score_change(self):
+        self.reviews[0].score = 1
+        self.reviews[0].save()
+        self.assert_totals_are_rebuilt_alike()
+
+    def test_title_move(self):
+        review = Review.objects.get(pk=self.reviews[1].pk)
+        review.title = self.titles[1]
+        review.score = 2
+        review.save()
+        self.assertEqual(Title.objects.get(pk=self.titles[1].pk).rating, 2)
+        self.assert_totals_are_rebuilt_alike()
+
+    def test_save_of_a_stale_title(self):
+        title = self.titles[0]
+        title.name = 'Renamed'
+        title.save()
+        title = Title.objects.get(pk=title.pk)
+        self.assertEqual((title.name, title.review_count, title.score_sum),
+                         ('Renamed', 3, 21))
+
+    def test_delete(self):
+        self.reviews[2].delete()
+        self.assert_totals_are_rebuilt_alike()
+
+    def test_delete_of_every_review(self):
+        Review.objects.all().delete()
+        title = Title.objects.get(pk=self.titles[0].pk)
+        self.assertEqual(
+            (title.review_count, title.score_sum, title.rating),
+            (0, 0, None))
+        self.assert_totals_are_rebuilt_alike()
+
+    def test_cascade_delete_of_an_author(self):
+        self.users[1].delete()
+        self.assertEqual(Title.objects.get(pk=self.titles[0].pk).rating, 6.5)
+        self.assert_totals_are_rebuilt_alike()
+
+    def test_cascade_delete_of_a_title(self):
+        Review.objects.create(
+            title=self.titles[1], author=self.users[0], text='Review.',
+            score=4)
+        Title.objects.filter(pk=self.titles[0].pk).delete()
+        self.assert_totals_are_rebuilt_alike()
+
+
+@override_settings(LEADERBOARD_PRIOR_VOTES=10, LEADERBOARD_PRIOR_SCORE=5.5)
+class LeaderboardTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Film', slug='film')
+        cls.genre = Genre.objects.create(name='Drama', slug='drama')
+        cls.users = [
+            CustomUser.objects.create(
+                username=f'user{number}',
+                email=f'user{number}@restviewer.test')
+            for number in range(5)
+        ]
+
+    def setUp(self):
+        self.title = self.create_title('Title', [10])
+
+    def create_title(self, name, scores, year=2000):
+        title = Title.objects.create(
+            name=name, year=year, category=self.category)
+        title.genre.add(self.genre)
+        for user, score in zip(self.users, scores):
+            Review.objects.create(
+                title=title, author=user, text='Review.', score=score)
+        return title
+
+    def board(self, scope, key=0):
+        return list(LeaderboardEntry.objects.board(scope, key).values_list(
+            'title_id', 'score'))
+
+    def boards(self):
+        return [
+            self.board(LeaderboardEntry.ALL),
+            self.board(LeaderboardEntry.CATEGORY, self.category.pk),
+            self.board(LeaderboardEntry.GENRE, self.genre.pk),
+            self.board(LeaderboardEntry.YEAR, 2000),
+        ]
+
+    def test_bayesian_order(self):
+        # (10 + 10 * 5.5) / 11 against (5 * 8 + 10 * 5.5) / 15.
+        many = self.create_title('Many', [8] * 5)
+        self.create_title('Unrated', [])
+        ranking = [(many.pk, 95 / 15), (self.title.pk, 65 / 11)]
+        for board in self.boards():
+            self.assertEqual(board, ranking)
+
+    def test_ties_rank_by_title(self):
+        other = self.create_title('Other', [10])
+        self.assertEqual(
+            [title_id for title_id, score
+             in self.board(LeaderboardEntry.ALL)],
+            [self.title.pk, other.pk])
+
+    def test_review_changes(self):
+        review = Review.objects.get()
+        review.score = 1
+        review.save()
+        self.assertEqual(self.board(LeaderboardEntry.ALL),
+                         [(self.title.pk, 56 / 11)])
+        Review.objects.create(
+            title=self.title, author=self.users[1], text='Review.', score=4)
+        self.assertEqual(self.board(LeaderboardEntry.ALL),
+                         [(self.title.pk, 60 / 12)])
+        Review.objects.all().delete()
+        self.assertEqual(self.boards(), [[], [], [], []])
+
+    def test_title_changes(self):
+        other = Category.objects.create(name='Books', slug='books')
+        self.title.year = 2001
+        self.title.category = other
+        self.title.save()
+        self.assertEqual(self.board(LeaderboardEntry.YEAR, 2000), [])
+        self.assertEqual(
+            self.board(LeaderboardEntry.CATEGORY, self.category.pk), [])
+        entry = [(self.title.pk, 65 / 11)]
+        self.assertEqual(self.board(LeaderboardEntry.YEAR, 2001), entry)
+        self.assertEqual(
+            self.board(LeaderboardEntry.CATEGORY, other.pk), entry)
+        self.title.delete()
+        self.assertFalse(LeaderboardEntry.objects.exists())
+
+    def test_genre_changes(self):
+        comedy = Genre.objects.create(name='Comedy', slug='comedy')
+        self.title.genre.set([comedy])
+        self.assertEqual(self.board(LeaderboardEntry.GENRE, self.genre.pk), [])
+        self.assertEqual(self.board(LeaderboardEntry.GENRE, comedy.pk),
+                         [(self.title.pk, 65 / 11)])
+        comedy.titles.clear()
+        self.assertEqual(self.board(LeaderboardEntry.GENRE, comedy.pk), [])
+        self.genre.titles.add(self.title)
+        self.assertEqual(self.board(LeaderboardEntry.GENRE, self.genre.pk),
+                         [(self.title.pk, 65 / 11)])
+        self.genre.delete()
+        self.assertFalse(LeaderboardEntry.objects.filter(
+            scope=LeaderboardEntry.GENRE).exists())
+
+    def test_category_delete(self):
+        self.category.delete()
+        self.assertFalse(LeaderboardEntry.objects.filter(
+            scope=LeaderboardEntry.CATEGORY).exists())
+        self.assertEqual(self.board(LeaderboardEntry.ALL),
+                         [(self.title.pk, 65 / 11)])
+
+    def test_rebuild_matches_the_stored_boards(self):
+        self.create_title('Many', [8, 3, 9])
+        stored = self.boards()
+        LeaderboardEntry.objects.all().delete()
+        Title.objects.rebuild_ratings()
+        self.assertEqual(self.boards(), stored)
+
+
+class FailingEmailBackend(EmailBackend):
+
+    def send_messages(self, messages):
+        raise ConnectionRefusedError('Mail server down.')
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class SendQueuedEmailTests(TestCase):
+
+    def setUp(self):
+        self.email = QueuedEmail.objects.create(
+            subject='Subject', message='Message.',
+            from_email='from@restviewer.test', recipient='to@restviewer.test')
+
+    def send(self, **options):
+        call_command('send_queued_email', retry_delay=60, max_attempts=3,
+                     stdout=StringIO(), **options)
+        self.email.refresh_from_db()
+
+    def make_due(self):
+        QueuedEmail.objects.update(send_after=timezone.now())
+
+    def test_send(self):
+        self.send()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Subject')
+        self.assertEqual(mail.outbox[0].to, ['to@restviewer.test'])
+        self.assertIsNotNone(self.email.sent)
+        self.assertEqual(self.email.attempts, 1)
+        self.send()
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(EMAIL_BACKEND='reviews.tests.FailingEmailBackend')
+    def test_retries_back_off_and_stop(self):
+        for attempt, delay in ((1, 60), (2, 120), (3, 240)):
+            started = timezone.now()
+            self.send()
+            self.assertEqual(self.email.attempts, attempt)
+            self.assertEqual(self.email.last_error, 'Mail server down.')
+            self.assertIsNone(self.email.sent)
+            self.assertGreaterEqual(
+                self.email.send_after, started + timedelta(seconds=delay))
+            self.assertLess(
+                self.email.send_after,
+                timezone.now() + timedelta(seconds=delay))
+            # Not due yet.
+            self.send()
+            self.assertEqual(self.email.attempts, attempt)
+            self.make_due()
+        self.send()
+        self.assertEqual(self.email.attempts, 3)
+
+    def test_retry_after_a_failure(self):
+        with override_settings(
+                EMAIL_BACKEND='reviews.tests.FailingEmailBackend'):
+            self.send()
+        self.make_due()
+        self.send()
+        self.assertEqual(self.email.attempts, 2)
+        self.assertIsNotNone(self.email.sent)
+        self.assertEqual(len(mail.outbox), 1)